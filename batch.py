@@ -0,0 +1,205 @@
+"""Headless batch generation of offer letters for a whole roster
+
+Usage:
+    python batch.py --output letters/
+    python batch.py --archive letters.zip --department Engineering --band L3 --workers 8
+    python batch.py --archive letters.zip --format pdf
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from letter_export import LETTER_FORMATS, LetterSink, render_letter
+from main import INDEX_CACHE_DIR, ROSTER_FILE, HROfferLetterRAG
+from roster import DEFAULT_CHUNKSIZE, enrich_roster, iter_roster_chunks
+
+# Each worker process keeps its own loaded generator so the model and index load once per worker
+_worker_rag = None
+
+
+def _init_worker(cache_dir, roster_path, policy_dir):
+    global _worker_rag
+    rag = HROfferLetterRAG(cache_dir=cache_dir, roster_path=roster_path, policy_dir=policy_dir)
+    if not rag.load_data_from_files(load_roster=False):
+        raise RuntimeError("Failed to load employee data and policy documents")
+    _worker_rag = rag
+
+
+def _render_letter(employee_info, letter_format="txt"):
+    letter = _worker_rag.render_offer_letter(employee_info)
+    if letter_format == "txt":
+        return letter
+    # PDF/DOCX conversion runs in the worker too, reusing its per-process fonts and base document
+    return render_letter(letter, letter_format, title=f"Offer Letter - {employee_info['Employee Name']}")
+
+
+def select_employees(employees_df, names=None, departments=None, bands=None, limit=None):
+    """Filter the roster down to the employees a batch should cover"""
+    selected = employees_df
+    if names:
+        wanted = {name.strip().lower() for name in names}
+        selected = selected[selected['Employee Name'].str.strip().str.lower().isin(wanted)]
+    if departments:
+        selected = selected[selected['Department'].isin(departments)]
+    if bands:
+        selected = selected[selected['Band'].isin(bands)]
+    if limit is not None:
+        selected = selected.head(limit)
+    return selected
+
+
+def iter_selected_employees(roster_path, chunksize=DEFAULT_CHUNKSIZE, names=None, departments=None,
+                            bands=None, limit=None, on_invalid=None, on_inconsistent=None):
+    """Stream matching, enriched employee rows chunk by chunk so memory stays bounded
+
+    `on_inconsistent(employee_info)` is called for rows whose salary components do
+    not add up to Total CTC; those letters are still rendered.
+    """
+    remaining = limit
+    for chunk in iter_roster_chunks(roster_path, chunksize=chunksize, on_invalid=on_invalid):
+        selected = select_employees(chunk, names=names, departments=departments, bands=bands, limit=remaining)
+        # Salary formatting and policy joins run once per chunk instead of once per letter
+        for employee_info in enrich_roster(selected).to_dict("records"):
+            if on_inconsistent is not None and not employee_info['ctc_consistent']:
+                on_inconsistent(employee_info)
+            yield employee_info
+        if remaining is not None:
+            remaining -= len(selected)
+            if remaining <= 0:
+                return
+
+
+def generate_batch(employees, output_dir=None, archive=None, workers=4, executor="process",
+                   cache_dir=INDEX_CACHE_DIR, roster_path=ROSTER_FILE, policy_dir=None, on_error=None,
+                   letter_format="txt"):
+    """Render letters for every employee row and stream them to a directory or archive
+
+    `employees` is any iterable of employee dicts and `letter_format` one of
+    LETTER_FORMATS. Returns a summary dict with counts, per-letter errors and throughput;
+    `aborted` holds the reason if the worker pool died before every row was submitted.
+    """
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor '{executor}', expected 'process' or 'thread'")
+    if letter_format not in LETTER_FORMATS:
+        raise ValueError(f"Unknown letter format '{letter_format}', expected one of {', '.join(LETTER_FORMATS)}")
+
+    # Build any missing policy indexes once here, so process workers only load them from the cache.
+    # Thread workers share this generator directly.
+    _init_worker(cache_dir, roster_path, policy_dir)
+
+    sink = LetterSink(output_dir=output_dir, archive=archive, letter_format=letter_format)
+
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_dir, roster_path, policy_dir))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    errors = []
+    succeeded = 0
+    aborted = None
+    started = time.perf_counter()
+
+    def collect(done, pending):
+        nonlocal succeeded
+        for future in done:
+            employee_name = pending.pop(future)
+            try:
+                letter = future.result()
+            except Exception as e:
+                errors.append({'employee': employee_name, 'error': str(e)})
+                if on_error is not None:
+                    on_error(employee_name, e)
+                continue
+            sink.write(employee_name, letter)
+            succeeded += 1
+
+    try:
+        with pool:
+            # Keep a bounded window of in-flight letters so large rosters are not queued all at once
+            pending = {}
+            max_in_flight = workers * 4
+            try:
+                for employee_info in employees:
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done, pending)
+                    future = pool.submit(_render_letter, employee_info, letter_format)
+                    pending[future] = employee_info['Employee Name']
+            except BrokenProcessPool as e:
+                # A worker died; letters already in flight are reported as failed below
+                aborted = f"Worker pool stopped: {e}"
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, pending)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - started
+    total = succeeded + len(errors)
+    return {
+        'total': total,
+        'succeeded': succeeded,
+        'failed': len(errors),
+        'errors': errors,
+        'aborted': aborted,
+        'elapsed_seconds': elapsed,
+        'letters_per_second': succeeded / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate offer letters for a whole roster")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="Directory to write one letter file per employee into")
+    target.add_argument("--archive", help="ZIP archive to stream the letters into")
+    parser.add_argument("--format", choices=LETTER_FORMATS, default="txt", dest="letter_format",
+                        help="Letter file format (default: %(default)s)")
+    parser.add_argument("--roster", default=ROSTER_FILE, help="Employee CSV to read (default: %(default)s)")
+    parser.add_argument("--name", action="append", dest="names", help="Only this employee (repeatable)")
+    parser.add_argument("--department", action="append", dest="departments", help="Only this department (repeatable)")
+    parser.add_argument("--band", action="append", dest="bands", help="Only this band (repeatable)")
+    parser.add_argument("--limit", type=int, help="Render at most this many letters")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Roster rows read per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Pool size (default: %(default)s)")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--cache-dir", default=INDEX_CACHE_DIR, help="Policy index cache directory")
+    parser.add_argument("--policy-dir", help="Index every PDF in this directory instead of the bundled policies")
+    args = parser.parse_args(argv)
+
+    def report_invalid(line_number, reason):
+        print(f"SKIPPED roster line {line_number}: {reason}", file=sys.stderr)
+
+    def report_inconsistent(employee_info):
+        print(f"WARNING {employee_info['Employee Name']}: salary components differ from Total CTC "
+              f"by {employee_info['ctc_mismatch_inr']}", file=sys.stderr)
+
+    def report_error(employee_name, error):
+        print(f"FAILED {employee_name}: {error}", file=sys.stderr)
+
+    employees = iter_selected_employees(
+        args.roster, chunksize=args.chunksize, names=args.names, departments=args.departments,
+        bands=args.bands, limit=args.limit, on_invalid=report_invalid, on_inconsistent=report_inconsistent,
+    )
+
+    summary = generate_batch(
+        employees, output_dir=args.output, archive=args.archive, workers=args.workers,
+        executor=args.executor, cache_dir=args.cache_dir, roster_path=args.roster,
+        policy_dir=args.policy_dir, on_error=report_error, letter_format=args.letter_format,
+    )
+
+    print(f"Generated {summary['succeeded']}/{summary['total']} letters "
+          f"in {summary['elapsed_seconds']:.2f}s ({summary['letters_per_second']:.1f} letters/s)")
+    if summary['aborted']:
+        print(f"Batch aborted, remaining employees were not processed: {summary['aborted']}", file=sys.stderr)
+    if summary['failed'] or summary['aborted']:
+        if summary['failed']:
+            print(f"{summary['failed']} letter(s) failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""Benchmark load, retrieval and letter generation on synthetic rosters and policies
+
+Usage:
+    python benchmark.py --employees 10000 --policy-pages 50 --output bench.json
+
+Results are written as JSON so runs can be compared for regressions.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from main import HROfferLetterRAG
+from policy_tables import BAND_LEAVE_POLICY, DEPARTMENT_WFO_POLICY
+
+FIRST_NAMES = ["Aarav", "Priya", "Martha", "Julie", "Rohan", "Ananya", "Christopher", "Tiffany",
+               "Vikram", "Meera", "Daniel", "Sara", "Arjun", "Kavya", "Lindsay", "Omar"]
+LAST_NAMES = ["Sharma", "Bennett", "Rodriguez", "Iyer", "Higgins", "Bradshaw", "Nair", "Swanson",
+              "Kapoor", "Hudson", "Menon", "Das", "Reddy", "Fernandes", "Joshi", "Patel"]
+LOCATIONS = ["Bengaluru", "Mumbai", "Pune", "Hyderabad", "Chennai", "Gurugram"]
+POLICY_SENTENCES = [
+    "Employees in band {band} are entitled to leave as set out in this policy.",
+    "The {department} team must follow the minimum work from office requirement.",
+    "All business travel must be approved before tickets or hotels are booked.",
+    "Per diem allowances cover meals and local conveyance for each travel day.",
+    "Unused earned leave may be carried forward up to the annual limit.",
+    "Hotel stays above the nightly cap require written approval from the approver.",
+]
+
+
+def write_roster(path, employees, seed=0):
+    """Write a synthetic Employee_List.csv with consistent salary columns"""
+    rng = random.Random(seed)
+    bands = list(BAND_LEAVE_POLICY)
+    departments = list(DEPARTMENT_WFO_POLICY)
+    names = []
+    with open(path, 'w', newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Employee Name", "Department", "Band", "Base Salary (INR)", "Performance Bonus (INR)",
+                         "Retention Bonus (INR)", "Total CTC (INR)", "Location", "Joining Date"])
+        for number in range(employees):
+            # The numeric suffix keeps names unique so lookups never tie
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {number}"
+            band_number = rng.randint(1, len(bands))
+            base = rng.randint(300_000, 900_000) * band_number
+            performance = base * rng.randint(5, 15) // 100
+            retention = base * rng.randint(2, 8) // 100
+            writer.writerow([name, rng.choice(departments), bands[band_number - 1], base, performance, retention,
+                             base + performance + retention, rng.choice(LOCATIONS),
+                             f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"])
+            names.append(name)
+    return names
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path, pages):
+    """Write a minimal PDF with one Helvetica text page per list of lines"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 790 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    with open(path, 'wb') as file:
+        file.write(output)
+
+
+def write_policies(directory, documents, pages_per_document, lines_per_page=50, seed=0):
+    """Write synthetic policy PDFs mentioning every band and department"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for number in range(documents):
+        pages = []
+        for _ in range(pages_per_document):
+            pages.append([
+                rng.choice(POLICY_SENTENCES).format(band=rng.choice(list(BAND_LEAVE_POLICY)),
+                                                    department=rng.choice(list(DEPARTMENT_WFO_POLICY)))
+                for _ in range(lines_per_page)
+            ])
+        write_text_pdf(os.path.join(directory, f"Synthetic-Policy-{number + 1}.pdf"), pages)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds"""
+    return {
+        'samples': len(samples),
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, or None where the resource module is missing (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(workdir, employees, policies, policy_pages, samples, seed=0):
+    roster_path = os.path.join(workdir, "Employee_List.csv")
+    policy_dir = os.path.join(workdir, "policies")
+    cache_dir = os.path.join(workdir, ".index_cache")
+    names = write_roster(roster_path, employees, seed=seed)
+    write_policies(policy_dir, policies, policy_pages, seed=seed)
+    policy_paths = sorted(os.path.join(policy_dir, name) for name in os.listdir(policy_dir))
+
+    def new_rag():
+        return HROfferLetterRAG(cache_dir=cache_dir, roster_path=roster_path, policy_dir=policy_dir)
+
+    results = {}
+
+    # Cold load builds every index from scratch; warm loads reuse the on-disk caches
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    cold_seconds, loaded = timed(new_rag().load_data_from_files)
+    if not loaded:
+        raise RuntimeError("Cold load failed; see the messages above")
+    warm_samples = []
+    for _ in range(3):
+        seconds, _ = timed(new_rag().load_data_from_files)
+        warm_samples.append(seconds)
+    results['load_data_from_files'] = {'cold': summarize([cold_seconds]), 'warm': summarize(warm_samples)}
+
+    rag = new_rag()
+    cold_parse = []
+    for path in policy_paths:
+        shutil.rmtree(rag.page_cache.cache_dir, ignore_errors=True)
+        seconds, _ = timed(rag.parse_pdf, path)
+        cold_parse.append(seconds)
+    warm_parse = [timed(rag.parse_pdf, path)[0] for path in policy_paths]
+    results['parse_pdf'] = {'cold': summarize(cold_parse), 'warm': summarize(warm_parse)}
+
+    # Index builds and cold retrieval start from an empty embedding cache so they time real inference
+    build_samples = []
+    for path in policy_paths:
+        shutil.rmtree(rag.embeddings.cache_dir, ignore_errors=True)
+        seconds, _ = timed(rag.build_policy_index, os.path.splitext(os.path.basename(path))[0], path)
+        build_samples.append(seconds)
+    results['index_build'] = summarize(build_samples)
+
+    rag.load_data_from_files()
+    rng = random.Random(seed)
+    sample_names = [rng.choice(names) for _ in range(samples)]
+    sample_rows = [rag.find_employee(name) for name in sample_names]
+
+    cold_context = []
+    for employee_info in sample_rows:
+        rag.invalidate_context_cache()
+        shutil.rmtree(rag.embeddings.cache_dir, ignore_errors=True)
+        cold_context.append(timed(rag.get_relevant_context, employee_info)[0])
+    warm_context = [timed(rag.get_relevant_context, employee_info)[0] for employee_info in sample_rows]
+    results['get_relevant_context'] = {'cold': summarize(cold_context), 'warm': summarize(warm_context)}
+
+    cold_letters = []
+    for name in sample_names:
+        rag.invalidate_context_cache()
+        cold_letters.append(timed(rag.generate_offer_letter, name)[0])
+    # Warm render keeps retrieval and template fragments cached but renders every letter again,
+    # which is what batch runs see since they never request the same letter twice
+    warm_render = []
+    for name in sample_names:
+        rag.letter_cache.clear()
+        warm_render.append(timed(rag.generate_offer_letter, name)[0])
+    cache_hits = [timed(rag.generate_offer_letter, name)[0] for name in sample_names]
+    results['generate_offer_letter'] = {
+        'cold': summarize(cold_letters),
+        'warm_render': summarize(warm_render),
+        'warm_cache_hit': summarize(cache_hits),
+        'letters_per_second_cold': len(cold_letters) / sum(cold_letters),
+        'letters_per_second_warm_render': len(warm_render) / sum(warm_render),
+        'letters_per_second_warm_cache_hit': len(cache_hits) / sum(cache_hits),
+    }
+
+    results['startup_report'] = rag.startup_report()
+    results['stage_metrics'] = rag.metrics.snapshot()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the offer letter generator")
+    parser.add_argument("--employees", type=int, default=1000, help="Synthetic roster size")
+    parser.add_argument("--policies", type=int, default=2, help="Number of synthetic policy PDFs")
+    parser.add_argument("--policy-pages", type=int, default=20, help="Pages per synthetic policy PDF")
+    parser.add_argument("--samples", type=int, default=200, help="Lookups and letters timed per phase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Keep generated inputs and caches here instead of a temp directory")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="offer-letter-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmark(workdir, args.employees, args.policies, args.policy_pages, args.samples,
+                                seed=args.seed)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key not in ("output", "workdir")},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count()},
+        'results': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
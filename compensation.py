@@ -0,0 +1,34 @@
+"""Indian-grouped rupee formatting for single values and whole columns"""
+import re
+
+# Letter fields formatted from each roster salary column
+SALARY_FIELDS = {
+    'base_salary': 'Base Salary (INR)',
+    'performance_bonus': 'Performance Bonus (INR)',
+    'retention_bonus': 'Retention Bonus (INR)',
+    'total_ctc': 'Total CTC (INR)',
+}
+SALARY_COMPONENT_COLUMNS = ['Base Salary (INR)', 'Performance Bonus (INR)', 'Retention Bonus (INR)']
+
+# Commas between every two digits left of the last three: 1234567 -> 12,34,567
+_LAKH_GROUPS = re.compile(r"\B(?=(\d{2})+$)")
+
+
+def format_inr(value):
+    """Format a rupee amount with Indian digit grouping, e.g. ₹12,34,567"""
+    value = int(value)
+    digits = str(abs(value))
+    head, tail = digits[:-3], digits[-3:]
+    grouped = f"{_LAKH_GROUPS.sub(',', head)},{tail}" if head else tail
+    return f"₹{'-' if value < 0 else ''}{grouped}"
+
+
+def format_inr_series(values):
+    """Vectorized format_inr over a pandas Series of integer amounts"""
+    values = values.astype("int64")
+    digits = values.abs().astype(str)
+    head = digits.str[:-3].str.replace(_LAKH_GROUPS, ",", regex=True)
+    tail = digits.str[-3:]
+    grouped = tail.where(head == "", head + "," + tail)
+    sign = values.lt(0).map({True: "-", False: ""})
+    return "₹" + sign + grouped
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain.embeddings.base import Embeddings
+
+DEFAULT_BATCH_SIZE = 64
+# How long a query waits for others to share its forward pass
+DEFAULT_MAX_WAIT_SECONDS = 0.005
+
+
+class CachedEmbeddings(Embeddings):
+    """Sentence-transformers embeddings with batching and a content-addressed vector cache
+
+    The model is loaded on first use. Every vector is stored on disk under a hash of
+    the model name and text, so repeated texts are never embedded twice across runs.
+    Concurrent embed_query calls are collected into shared batches so CPU inference
+    is amortized.
+    """
+
+    def __init__(self, model_name, cache_dir=None, cache_dtype="float32", batch_size=DEFAULT_BATCH_SIZE,
+                 max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS, metrics=None):
+        if cache_dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported cache dtype '{cache_dtype}', expected 'float32' or 'float16'")
+        self.model_name = model_name
+        self.cache_dir = os.path.join(cache_dir, model_name.replace("/", "__")) if cache_dir else None
+        self.cache_dtype = cache_dtype
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.metrics = metrics
+        self.load_seconds = None
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._queries = None
+        self._batcher_pid = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        """Construct the underlying model now, recording how long it took"""
+        with self._load_lock:
+            if self._model is None:
+                started = time.perf_counter()
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+                self.load_seconds = time.perf_counter() - started
+        return self._model
+
+    def _count(self, counter, amount=1):
+        if self.metrics is not None and amount:
+            self.metrics.increment(counter, amount)
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    def _read(self, key):
+        import numpy as np
+        # Each file holds a single small vector that is copied out at once, so a plain read beats mmap
+        try:
+            return np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key, vector):
+        import numpy as np
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(staging_path, 'wb') as file:
+            np.save(file, np.asarray(vector, dtype=self.cache_dtype))
+        os.replace(staging_path, path)
+
+    def _encode(self, texts):
+        # Match HuggingFaceEmbeddings so vectors agree with indexes it built
+        texts = [text.replace("\n", " ") for text in texts]
+        self._count('embedding_forward_passes', -(-len(texts) // self.batch_size))
+        vectors = self.load().encode(texts, batch_size=self.batch_size, show_progress_bar=False)
+        return [vector.tolist() for vector in vectors]
+
+    def _embed(self, texts, encode):
+        """Serve cached vectors and encode the rest in one call, writing them back"""
+        vectors = [None] * len(texts)
+        keys = [self._key(text) for text in texts]
+        if self.cache_dir:
+            for position, key in enumerate(keys):
+                cached = self._read(key)
+                if cached is not None:
+                    vectors[position] = cached.astype("float32").tolist()
+
+        missing = [position for position, vector in enumerate(vectors) if vector is None]
+        self._count('embedding_cache_hit', len(texts) - len(missing))
+        self._count('embedding_cache_miss', len(missing))
+        if missing:
+            # Identical texts in one request are encoded once
+            unique_texts = list(dict.fromkeys(texts[position] for position in missing))
+            encoded = dict(zip(unique_texts, encode(unique_texts)))
+            for position in missing:
+                vectors[position] = encoded[texts[position]]
+            if self.cache_dir:
+                for text, vector in encoded.items():
+                    self._write(self._key(text), vector)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), self._encode)
+
+    def embed_query(self, text):
+        return self._embed([text], self._encode_queued)[0]
+
+    def _encode_queued(self, texts):
+        futures = [self._submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def _submit(self, text):
+        # A forked worker does not inherit the batching thread, so start one per process
+        if self._batcher_pid != os.getpid():
+            with self._load_lock:
+                if self._batcher_pid != os.getpid():
+                    self._queries = queue.Queue()
+                    threading.Thread(target=self._run_batcher, args=(self._queries,), daemon=True).start()
+                    self._batcher_pid = os.getpid()
+        future = Future()
+        self._queries.put((text, future))
+        return future
+
+    def _run_batcher(self, queries):
+        while True:
+            batch = [queries.get()]
+            deadline = time.perf_counter() + self.max_wait_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(queries.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self._encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
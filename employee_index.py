@@ -0,0 +1,160 @@
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+# Fuzzy candidates below this trigram similarity are not worth suggesting
+MIN_FUZZY_SCORE = 0.3
+# Trigrams shared by more rows than this are skipped once rarer trigrams have produced candidates
+MAX_POSTINGS = 5000
+
+# Ranking tiers, best first
+EXACT, PREFIX, SUBSTRING, FUZZY = 3, 2, 1, 0
+
+
+def normalize_name(name):
+    """Case-fold, strip accents and collapse whitespace so lookups ignore formatting"""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def name_trigrams(normalized):
+    """Trigrams of each name token, padded so short prefixes still match"""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class EmployeeIndex:
+    """Hash, prefix and trigram indexes over the roster, built once at load time"""
+
+    ID_COLUMN = "Employee ID"
+
+    def __init__(self, names, ids=None):
+        """Index roster names, and employee IDs when the roster has them, by row position"""
+        self.display_names = ["" if name is None else str(name) for name in names]
+        self.names = [normalize_name(name) for name in self.display_names]
+
+        # Row positions shift whenever rows are skipped or reordered, so they never stand in for IDs
+        self.has_ids = ids is not None
+        self.by_id = {
+            str(employee_id).strip(): position for position, employee_id in enumerate(ids or [])
+            if employee_id is not None and str(employee_id).strip()
+        }
+
+        self.by_name = defaultdict(list)
+        self.trigram_index = defaultdict(list)
+        for position, normalized in enumerate(self.names):
+            self.by_name[normalized].append(position)
+            for gram in name_trigrams(normalized):
+                self.trigram_index[gram].append(position)
+
+        self.sorted_names = sorted((normalized, position) for position, normalized in enumerate(self.names))
+        self.sorted_keys = [normalized for normalized, _ in self.sorted_names]
+
+    @classmethod
+    def from_dataframe(cls, employees_df):
+        names = employees_df['Employee Name'].fillna("").astype(str).tolist()
+        ids = None
+        if cls.ID_COLUMN in employees_df.columns:
+            column = employees_df[cls.ID_COLUMN].astype("string")
+            ids = [None if missing else employee_id
+                   for employee_id, missing in zip(column.tolist(), column.isna().tolist())]
+        return cls(names, ids)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup_id(self, employee_id):
+        """Return the row position for an employee ID, or None (always None without an ID column)"""
+        return self.by_id.get(str(employee_id).strip())
+
+    def lookup_name(self, name):
+        """Return row positions whose normalized name matches exactly"""
+        return list(self.by_name.get(normalize_name(name), []))
+
+    def _prefix_matches(self, query, limit):
+        matches = []
+        start = bisect_left(self.sorted_keys, query)
+        for normalized, position in self.sorted_names[start:]:
+            if not normalized.startswith(query) or len(matches) >= limit:
+                break
+            matches.append(position)
+        return matches
+
+    def _trigram_candidates(self, query_grams):
+        shared = defaultdict(int)
+        # Walk the rarest trigrams first so very common ones can be skipped on large rosters
+        for gram in sorted(query_grams, key=lambda g: len(self.trigram_index.get(g, ()))):
+            postings = self.trigram_index.get(gram)
+            if not postings:
+                continue
+            if len(postings) > MAX_POSTINGS and shared:
+                break
+            for position in postings:
+                shared[position] += 1
+        return shared
+
+    def search(self, query, limit=5):
+        """Rank candidate rows for a full or partial name
+
+        Returns up to `limit` (position, tier, score) tuples, best first. Tiers are
+        EXACT, PREFIX, SUBSTRING and FUZZY; score is trigram similarity in [0, 1].
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        ranked = {}
+        for position in self.by_name.get(normalized, []):
+            ranked[position] = (EXACT, 1.0)
+        for position in self._prefix_matches(normalized, limit):
+            ranked.setdefault(position, (PREFIX, 1.0))
+
+        query_grams = name_trigrams(normalized)
+        for position, shared in self._trigram_candidates(query_grams).items():
+            if position in ranked:
+                continue
+            candidate_grams = len(name_trigrams(self.names[position]))
+            score = shared / (len(query_grams) + candidate_grams - shared)
+            if normalized in self.names[position]:
+                ranked[position] = (SUBSTRING, score)
+            elif score >= MIN_FUZZY_SCORE:
+                ranked[position] = (FUZZY, score)
+
+        best = sorted(ranked.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        return [(position, tier, score) for position, (tier, score) in best[:limit]]
+
+    def resolve(self, query):
+        """Return the single row a name refers to, or raise ValueError listing the candidates
+
+        An exact name, or a prefix or substring that only one employee's name has,
+        resolves. Shared names and fuzzy matches are never picked silently.
+        """
+        exact = self.lookup_name(query)
+        if len(exact) == 1:
+            return exact[0]
+        if exact:
+            names = ", ".join(self.display_names[position] for position in exact)
+            raise ValueError(f"Several employees are named '{query}': {names}")
+
+        candidates = self.search(query)
+        if not candidates:
+            raise ValueError(f"Employee '{query}' not found")
+        position, tier, _ = candidates[0]
+        if tier in (PREFIX, SUBSTRING) and self._is_unique_partial(query, tier, candidates):
+            return position
+        names = ", ".join(self.display_names[p] for p, _, _ in candidates)
+        raise ValueError(f"No unique match for '{query}'. Closest employees: {names}")
+
+    def _is_unique_partial(self, query, tier, candidates):
+        if sum(1 for _, t, _ in candidates if t == tier) > 1:
+            return False
+        if tier == PREFIX:
+            # Prefix matches are gathered exhaustively from the sorted name list
+            return True
+        # Trigram candidates may skip very common trigrams, so confirm against every name
+        normalized = normalize_name(query)
+        return sum(1 for name in self.names if normalized in name) == 1
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+def chunk_ids(chunks):
+    """Stable IDs from each chunk's source and text, so unchanged chunks keep their ID"""
+    ids = []
+    seen = {}
+    for chunk in chunks:
+        digest = hashlib.sha256(f"{chunk.metadata.get('source')}\0{chunk.page_content}".encode("utf-8")).hexdigest()
+        # Repeated boilerplate within a document gets an occurrence suffix to stay unique
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(digest if occurrence == 0 else f"{digest}-{occurrence}")
+    return ids
+
+
+class PolicyIndexCache:
+    """Persist per-document FAISS indexes so warm starts skip the embedding pass"""
+
+    MANIFEST_FILE = "manifest.json"
+    # Kept apart from the page-text and vector caches that share cache_dir, so no
+    # policy file name (e.g. "_pages.pdf") can map onto and overwrite one of them
+    INDEX_SUBDIR = "indexes"
+
+    def __init__(self, cache_dir, model_name, chunk_size, chunk_overlap):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @property
+    def settings(self):
+        return {
+            'model_name': self.model_name,
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+        }
+
+    def document_key(self, filepath):
+        """Hash the PDF bytes together with the embedding and chunking settings"""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(json.dumps(self.settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def index_dir(self):
+        return os.path.join(self.cache_dir, self.INDEX_SUBDIR)
+
+    def _entry_dir(self, source):
+        return os.path.join(self.index_dir, source)
+
+    def _read_manifest(self, source):
+        try:
+            with open(os.path.join(self._entry_dir(source), self.MANIFEST_FILE), 'r', encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _load_store(self, source, embeddings):
+        from langchain.vectorstores import FAISS
+        try:
+            return FAISS.load_local(self._entry_dir(source), embeddings, allow_dangerous_deserialization=True)
+        except Exception:
+            # A corrupt or partially written entry is treated as a miss and rebuilt
+            return None
+
+    def load(self, source, key, embeddings):
+        """Return the cached store for a document, or None if it is missing or stale"""
+        manifest = self._read_manifest(source)
+        if manifest is None or manifest.get('key') != key:
+            return None
+        return self._load_store(source, embeddings)
+
+    def load_previous(self, source, embeddings):
+        """Return the last saved store for a document even if its PDF has since changed
+
+        Entries built with different embedding or chunking settings are not reusable
+        and come back as None.
+        """
+        manifest = self._read_manifest(source)
+        if manifest is None or manifest.get('settings') != self.settings:
+            return None
+        return self._load_store(source, embeddings)
+
+    def sources(self):
+        """Source names that currently have a cache entry"""
+        if not os.path.isdir(self.index_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.index_dir)
+            if not name.endswith(".tmp") and self._read_manifest(name) is not None
+        )
+
+    def remove(self, source):
+        shutil.rmtree(self._entry_dir(source), ignore_errors=True)
+
+    def save(self, source, key, store):
+        """Write a document's store next to a manifest recording its cache key"""
+        entry_dir = self._entry_dir(source)
+        # Per-writer staging so concurrent processes building the same entry do not collide
+        staging_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        store.save_local(staging_dir)
+        with open(os.path.join(staging_dir, self.MANIFEST_FILE), 'w', encoding="utf-8") as file:
+            json.dump({
+                'key': key,
+                'source': source,
+                'settings': self.settings,
+                'chunk_ids': list(store.index_to_docstore_id.values()),
+            }, file, indent=2)
+
+        # Swap the finished entry into place so readers never see half an index
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.replace(staging_dir, entry_dir)
+        except OSError:
+            # Another writer swapped its entry in first; keep theirs
+            shutil.rmtree(staging_dir, ignore_errors=True)
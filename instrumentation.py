@@ -0,0 +1,155 @@
+"""Per-stage timers, event counters and optional profiling for the letter generator"""
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Thread-safe stage timings and counters with a Prometheus-style text dump"""
+
+    def __init__(self, namespace="offer_letter"):
+        self.namespace = namespace
+        # Requests a capture of the next profiled block; cleared once that capture starts
+        self.profile_enabled = False
+        self.last_profile = None
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._profiling = False
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            count, total, slowest = self._stages.get(stage, (0, 0.0, 0.0))
+            self._stages[stage] = (count + 1, total + seconds, max(slowest, seconds))
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    @contextmanager
+    def time(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def _acquire_profile_slot(self, force):
+        # tracemalloc is process-wide, so only one block may be profiled at a time
+        with self._lock:
+            if self._profiling or not (force or self.profile_enabled):
+                return False
+            self._profiling = True
+            if not force:
+                self.profile_enabled = False
+            return True
+
+    def _release_profile_slot(self):
+        with self._lock:
+            self._profiling = False
+
+    @contextmanager
+    def profile(self, label, force=False):
+        """Capture cProfile and tracemalloc output for the block once
+
+        Runs when `force` is set or a capture was requested through profile_enabled.
+        Blocks nested in, or concurrent with, a capture run unprofiled.
+        """
+        if not self._acquire_profile_slot(force):
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            try:
+                after = tracemalloc.take_snapshot()
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+            finally:
+                self._release_profile_slot()
+
+            stats_text = io.StringIO()
+            pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(25)
+            self.last_profile = {
+                'label': label,
+                'cprofile': stats_text.getvalue(),
+                'tracemalloc_top': [str(stat) for stat in after.compare_to(before, "lineno")[:15]],
+                'peak_traced_bytes': peak_bytes,
+            }
+
+    def snapshot(self):
+        """Return stage timings and counters as plain dicts"""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': count,
+                    'total_seconds': total,
+                    'mean_ms': total / count * 1000,
+                    'max_ms': slowest * 1000,
+                }
+                for stage, (count, total, slowest) in sorted(self._stages.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {'stages': stages, 'counters': counters}
+
+    def to_prometheus(self):
+        """Render the current metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        prefix = self.namespace
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent in each generator stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["total_seconds"]:.6f}'
+                  for stage, values in snapshot['stages'].items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Number of times each generator stage ran.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {values["count"]}'
+                  for stage, values in snapshot['stages'].items()]
+        lines += [
+            f"# HELP {prefix}_stage_max_seconds Slowest single run of each generator stage.",
+            f"# TYPE {prefix}_stage_max_seconds gauge",
+        ]
+        lines += [f'{prefix}_stage_max_seconds{{stage="{stage}"}} {values["max_ms"] / 1000:.6f}'
+                  for stage, values in snapshot['stages'].items()]
+        lines += [
+            f"# HELP {prefix}_events_total Cache hits, misses and other generator events.",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        lines += [f'{prefix}_events_total{{event="{event}"}} {count}'
+                  for event, count in snapshot['counters'].items()]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+        self.last_profile = None
+
+
+def instrumented(stage):
+    """Time a method into `self.metrics` under the given stage name"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.time(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
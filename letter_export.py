@@ -0,0 +1,238 @@
+"""PDF and DOCX rendering of offer letters, and streaming ZIP export
+
+Fonts, page geometry and the base DOCX document are prepared once per process and
+reused for every letter, so bulk exports pay only for laying out each letter's text.
+"""
+import io
+import os
+import textwrap
+import threading
+import zipfile
+
+LETTER_FORMATS = ("txt", "pdf", "docx")
+MIME_TYPES = {
+    'txt': "text/plain",
+    'pdf': "application/pdf",
+    'docx': "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Letters align columns with spaces, so they are laid out in a monospaced font
+PDF_FONT_CANDIDATES = [
+    os.environ.get("OFFER_LETTER_PDF_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSansMono.ttf",
+    "/Library/Fonts/DejaVuSansMono.ttf",
+    "C:\\Windows\\Fonts\\DejaVuSansMono.ttf",
+]
+PDF_FONT_SIZE = 9.5
+PDF_LEADING = 12.5
+PDF_MARGIN = 48
+DOCX_FONT = "Courier New"
+
+# Stand-ins for characters the built-in Courier font cannot draw
+FALLBACK_SUBSTITUTIONS = {'₹': "Rs.", '═': "=", '─': "-"}
+
+_layout = None
+_docx_base = None
+_resource_lock = threading.Lock()
+
+
+def _fit_to_font(line, supports, substitutions):
+    """Substitute or drop characters the font cannot draw, e.g. emoji section markers"""
+    output = []
+    skip_space = False
+    for char in line:
+        if skip_space and char == " ":
+            skip_space = False
+            continue
+        skip_space = False
+        if supports(char):
+            output.append(char)
+        elif char in substitutions:
+            output.append(substitutions[char])
+        elif not output or output[-1] == " ":
+            # Dropping a marker at a word boundary should not leave a double space
+            skip_space = True
+    return "".join(output)
+
+
+class _PdfLayout:
+    """Registered font and page geometry shared by every PDF in the process"""
+
+    def __init__(self):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        self.page_width, self.page_height = A4
+        self.font_name = "Courier"
+        self.substitutions = FALLBACK_SUBSTITUTIONS
+        self.supports = self._supports_cp1252
+        for path in PDF_FONT_CANDIDATES:
+            if path and os.path.exists(path):
+                font = TTFont("OfferLetterMono", path)
+                pdfmetrics.registerFont(font)
+                self.font_name = "OfferLetterMono"
+                glyphs = font.face.charToGlyph
+                self.supports = lambda char: ord(char) in glyphs
+                self.substitutions = {char: value for char, value in FALLBACK_SUBSTITUTIONS.items()
+                                      if ord(char) not in glyphs}
+                break
+
+        char_width = pdfmetrics.stringWidth("M", self.font_name, PDF_FONT_SIZE)
+        self.max_chars = int((self.page_width - 2 * PDF_MARGIN) // char_width)
+        self.lines_per_page = int((self.page_height - 2 * PDF_MARGIN) // PDF_LEADING)
+        self._fitted = {}
+
+    @staticmethod
+    def _supports_cp1252(char):
+        try:
+            char.encode("cp1252")
+            return True
+        except UnicodeEncodeError:
+            return False
+
+    def layout_lines(self, letter):
+        lines = []
+        for line in letter.splitlines():
+            # Static template lines repeat across letters, so fitting is memoized
+            fitted = self._fitted.get(line)
+            if fitted is None:
+                fitted = _fit_to_font(line, self.supports, self.substitutions)
+                if len(self._fitted) < 10_000:
+                    self._fitted[line] = fitted
+            if len(fitted) <= self.max_chars:
+                lines.append(fitted)
+                continue
+            indent = " " * (len(fitted) - len(fitted.lstrip(" ")))
+            lines.extend(textwrap.wrap(fitted, self.max_chars, subsequent_indent=indent + "  ") or [""])
+        return lines
+
+
+def _get_layout():
+    global _layout
+    with _resource_lock:
+        if _layout is None:
+            _layout = _PdfLayout()
+    return _layout
+
+
+def render_pdf(letter, title="Offer Letter"):
+    """Render a letter's text as PDF bytes"""
+    from reportlab.pdfgen import canvas
+
+    layout = _get_layout()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(layout.page_width, layout.page_height), pageCompression=1)
+    pdf.setTitle(title)
+    lines = layout.layout_lines(letter)
+    for start in range(0, max(len(lines), 1), layout.lines_per_page):
+        text = pdf.beginText(PDF_MARGIN, layout.page_height - PDF_MARGIN)
+        text.setFont(layout.font_name, PDF_FONT_SIZE, leading=PDF_LEADING)
+        for line in lines[start:start + layout.lines_per_page]:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _get_docx_base():
+    """Serialized empty document with the letter's font and margins applied"""
+    global _docx_base
+    with _resource_lock:
+        if _docx_base is None:
+            from docx import Document
+            from docx.shared import Pt
+
+            document = Document()
+            style = document.styles['Normal']
+            style.font.name = DOCX_FONT
+            style.font.size = Pt(9.5)
+            style.paragraph_format.space_after = Pt(0)
+            style.paragraph_format.space_before = Pt(0)
+            for section in document.sections:
+                section.left_margin = section.right_margin = Pt(PDF_MARGIN)
+                section.top_margin = section.bottom_margin = Pt(PDF_MARGIN)
+            buffer = io.BytesIO()
+            document.save(buffer)
+            _docx_base = buffer.getvalue()
+    return _docx_base
+
+
+def render_docx(letter, title="Offer Letter"):
+    """Render a letter's text as DOCX bytes, one paragraph per line"""
+    from docx import Document
+
+    document = Document(io.BytesIO(_get_docx_base()))
+    document.core_properties.title = title
+    for line in letter.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def render_letter(letter, letter_format, title="Offer Letter"):
+    """Return a letter as bytes in one of LETTER_FORMATS"""
+    if letter_format == "txt":
+        return letter.encode("utf-8")
+    if letter_format == "pdf":
+        return render_pdf(letter, title=title)
+    if letter_format == "docx":
+        return render_docx(letter, title=title)
+    raise ValueError(f"Unknown letter format '{letter_format}', expected one of {', '.join(LETTER_FORMATS)}")
+
+
+def letter_filename(employee_name, seen, extension="txt"):
+    """Build the download file name used by the UI, de-duplicating repeated names"""
+    base = f"{employee_name.replace(' ', '_')}_offer_letter"
+    count = seen.get(base, 0)
+    seen[base] = count + 1
+    return f"{base}.{extension}" if count == 0 else f"{base}_{count + 1}.{extension}"
+
+
+class LetterSink:
+    """Write finished letters to a directory or into a ZIP archive as they arrive
+
+    `archive` is a path or a writable file object. Each letter is written as soon as
+    it is handed over, so only one letter is held in memory at a time.
+    """
+
+    def __init__(self, output_dir=None, archive=None, letter_format="txt"):
+        if (output_dir is None) == (archive is None):
+            raise ValueError("Specify exactly one of output_dir or archive")
+        self.output_dir = output_dir
+        self.letter_format = letter_format
+        self.count = 0
+        self.archive = None
+        self._seen = {}
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            # PDF and DOCX are compressed internally, so deflating them again only costs CPU
+            compression = zipfile.ZIP_DEFLATED if letter_format == "txt" else zipfile.ZIP_STORED
+            self.archive = zipfile.ZipFile(archive, 'w', compression=compression)
+
+    def write(self, employee_name, letter):
+        """Write a text letter or already-rendered PDF/DOCX bytes under the employee's file name"""
+        filename = letter_filename(employee_name, self._seen, self.letter_format)
+        if self.archive is not None:
+            self.archive.writestr(filename, letter)
+        elif isinstance(letter, bytes):
+            with open(os.path.join(self.output_dir, filename), 'wb') as file:
+                file.write(letter)
+        else:
+            with open(os.path.join(self.output_dir, filename), 'w', encoding="utf-8") as file:
+                file.write(letter)
+        self.count += 1
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,135 @@
+"""File-based letter templates compiled once and specialized per band and department"""
+import hashlib
+import os
+from string import Formatter
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DEFAULT_TEMPLATE = "offer_letter"
+DEFAULT_LOCALE = "en"
+
+
+def _format_field(value, format_spec, conversion):
+    if conversion == "r":
+        value = repr(value)
+    elif conversion == "s":
+        value = str(value)
+    elif conversion == "a":
+        value = ascii(value)
+    return format(value, format_spec) if format_spec else str(value)
+
+
+class LetterTemplate:
+    """A template parsed once into literal text and {field} placeholders
+
+    Fields that depend only on the employee's band and department are baked into a
+    cached fragment per group, leaving a short list of per-employee fields to splice in.
+    """
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self._segments = [
+            (literal, field_name, format_spec, conversion)
+            for literal, field_name, format_spec, conversion in Formatter().parse(source)
+        ]
+        self.field_names = {field_name for _, field_name, _, _ in self._segments if field_name is not None}
+        self._fragments = {}
+
+    def fragment(self, group_key, group_fields):
+        """Return the template with group fields filled in, compiling it on first use
+
+        `group_fields` is a callable returning the band/department field values so
+        the work behind them only runs on a cache miss.
+        """
+        fragment = self._fragments.get(group_key)
+        if fragment is None:
+            fragment = self._compile(group_fields())
+            self._fragments[group_key] = fragment
+        return fragment
+
+    def has_fragment(self, group_key):
+        return group_key in self._fragments
+
+    def _compile(self, group_values):
+        literals = []
+        fields = []
+        pending = []
+        for literal, field_name, format_spec, conversion in self._segments:
+            pending.append(literal)
+            if field_name is None:
+                continue
+            if field_name in group_values:
+                pending.append(_format_field(group_values[field_name], format_spec, conversion))
+            else:
+                literals.append("".join(pending))
+                fields.append((field_name, format_spec, conversion))
+                pending = []
+        literals.append("".join(pending))
+        return literals, fields
+
+    def render(self, group_key, group_fields, employee_fields):
+        """Splice per-employee values into the cached fragment for this group"""
+        literals, fields = self.fragment(group_key, group_fields)
+        parts = [literals[0]]
+        for (field_name, format_spec, conversion), literal in zip(fields, literals[1:]):
+            try:
+                value = employee_fields[field_name]
+            except KeyError:
+                raise ValueError(f"Template '{self.name}' uses unknown field '{field_name}'") from None
+            parts.append(_format_field(value, format_spec, conversion))
+            parts.append(literal)
+        return "".join(parts)
+
+    def clear_fragments(self):
+        self._fragments.clear()
+
+
+class TemplateRegistry:
+    """Load templates from `<name>[.<role>].<locale>.txt` files, compiling each once
+
+    Lookups fall back from the role-specific template to the locale's generic one
+    and finally to the default locale.
+    """
+
+    def __init__(self, directory=TEMPLATE_DIR):
+        self.directory = directory
+        self._templates = {}
+
+    def _candidates(self, name, locale, role):
+        role = role.strip().lower().replace(" ", "_") if role else None
+        for candidate_locale in dict.fromkeys([locale, DEFAULT_LOCALE]):
+            if role:
+                yield f"{name}.{role}.{candidate_locale}"
+            yield f"{name}.{candidate_locale}"
+
+    def get(self, name=DEFAULT_TEMPLATE, locale=DEFAULT_LOCALE, role=None):
+        for template_id in self._candidates(name, locale, role):
+            if template_id in self._templates:
+                template = self._templates[template_id]
+            else:
+                path = os.path.join(self.directory, template_id + ".txt")
+                template = None
+                if os.path.exists(path):
+                    with open(path, 'r', encoding="utf-8") as file:
+                        template = LetterTemplate(template_id, file.read())
+                # Cache misses too so absent role variants are not re-checked per letter
+                self._templates[template_id] = template
+            if template is not None:
+                return template
+        raise ValueError(f"No '{name}' template found for locale '{locale}' in {self.directory}")
+
+    def available_locales(self, name=DEFAULT_TEMPLATE):
+        """Locales that have a `name` template file, generic or role-specific"""
+        prefix = name + "."
+        return {
+            filename[:-len(".txt")].rsplit(".", 1)[-1]
+            for filename in os.listdir(self.directory)
+            if filename.startswith(prefix) and filename.endswith(".txt")
+        }
+
+    def clear_fragments(self):
+        """Drop compiled band/department fragments, e.g. after the policy index changes"""
+        for template in self._templates.values():
+            if template is not None:
+                template.clear_fragments()
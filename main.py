@@ -1,78 +1,193 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import hashlib
+import json
+import os
 import sys
+import threading
 import importlib
+import tempfile
 import pysqlite3
 sys.modules["sqlite3"] = importlib.import_module("pysqlite3")
 
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import PyPDF2
 from io import StringIO
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import FAISS
-from langchain.schema import Document
+from index_cache import PolicyIndexCache, chunk_ids
+from employee_index import EmployeeIndex
+from policy_ingest import PageTextCache, discover_policies, extract_pdf_text
+from letter_templates import DEFAULT_LOCALE, TemplateRegistry
+from policy_tables import (
+    BAND_LEAVE_POLICY, BAND_TRAVEL_POLICY, DEPARTMENT_WFO_POLICY, LETTER_POLICY_FIELDS, POLICY_TABLES_DIGEST,
+    POSITION_TITLES
+)
+from compensation import SALARY_FIELDS, format_inr
+from instrumentation import Metrics, instrumented
+from result_cache import LetterResultCache, letter_cache_key
+from letter_export import LETTER_FORMATS, MIME_TYPES, LetterSink, letter_filename, render_letter
+
+# pandas, PyPDF2, langchain, FAISS and sentence-transformers are imported where first needed
+MODULE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+INDEX_CACHE_DIR = ".index_cache"
+# Set to "float16" to halve the on-disk embedding cache at a small precision cost
+EMBEDDING_CACHE_DTYPE = "float32"
+ROSTER_FILE = "Employee_List.csv"
+SIDEBAR_EMPLOYEE_LIMIT = 200
+# Template field that receives the retrieved policy passages; retrieval only runs for templates that use it
+CONTEXT_FIELD = "policy_context"
+
+# Policy documents indexed for retrieval, keyed by the source name stored in chunk metadata
+POLICY_FILES = {
+    "HR-Leave-Policy": "HR-Leave-Policy.pdf",
+    "HR-Travel-Policy": "HR-Travel-Policy.pdf",
+}
 
 class HROfferLetterRAG:
-    def __init__(self):
+    def __init__(self, cache_dir=INDEX_CACHE_DIR, roster_path=ROSTER_FILE, lazy=True, policy_dir=None,
+                 letter_cache_path=None):
+        self.roster_path = roster_path
+        self.cache_dir = cache_dir
+        self.metrics = Metrics()
+        # Either every PDF in policy_dir or the two bundled policy documents
+        self.policy_dir = policy_dir
+        self.page_cache = PageTextCache(os.path.join(cache_dir, "_pages"))
         self.employees_df = None
+        self.employee_index = None
         self.vector_store = None
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-        self.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        # Chunk IDs per policy source currently in vector_store, and the files they came from
+        self.source_chunk_ids = {}
+        self.policy_file_state = {}
+        # Document cache key per policy source, which together version the index
+        self.policy_keys = {}
+        # Guards vector_store while policies are reloaded under live traffic
+        self._index_lock = threading.RLock()
+        # Serializes reloads, which parse and embed without holding _index_lock
+        self._reload_lock = threading.Lock()
+        self._text_splitter = None
+        self._embeddings = None
+        # Seconds spent in each startup stage, surfaced through startup_report()
+        self.startup_timings = {}
+        if not lazy:
+            # Eager mode pays the import and model load cost at construction time
+            self._text_splitter = self.text_splitter
+            self.embeddings.load()
+        self.index_cache = PolicyIndexCache(cache_dir, EMBEDDING_MODEL_NAME, CHUNK_SIZE, CHUNK_OVERLAP)
+        # Retrieved policy context keyed by (Band, Department), the only inputs to the query
+        self.context_cache = {}
+        self.templates = TemplateRegistry()
+        # Rendered letters; letter_cache_path adds a SQLite tier that survives restarts
+        self.letter_cache = LetterResultCache(sqlite_path=letter_cache_path)
+    
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            self._text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        return self._text_splitter
+    
+    @property
+    def embeddings(self):
+        # The model itself is only loaded once something needs embedding
+        if self._embeddings is None:
+            from embedding_store import CachedEmbeddings
+            self._embeddings = CachedEmbeddings(
+                EMBEDDING_MODEL_NAME,
+                cache_dir=os.path.join(self.cache_dir, "_embeddings"),
+                cache_dtype=EMBEDDING_CACHE_DTYPE,
+                metrics=self.metrics
+            )
+        return self._embeddings
     
+    def _record_timing(self, stage, started):
+        seconds = time.perf_counter() - started
+        self.startup_timings[stage] = self.startup_timings.get(stage, 0.0) + seconds
+        self.metrics.observe(stage, seconds)
+    
+    def startup_report(self):
+        """Seconds spent importing, loading the model and loading or building the index"""
+        report = {'module_import': MODULE_IMPORT_SECONDS}
+        report.update(self.startup_timings)
+        if self._embeddings is not None and self._embeddings.load_seconds is not None:
+            report['embedding_model_load'] = self._embeddings.load_seconds
+        return report
+    
+    @instrumented('parse_pdf')
     def parse_pdf(self, filepath):
         """Parse PDF file and return text"""
         try:
-            with open(filepath, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text.strip()
+            return extract_pdf_text(filepath, page_cache=self.page_cache)
         except Exception as e:
             st.error(f"Error parsing {filepath}: {str(e)}")
             return ""
     
-    def load_data_from_files(self):
-        """Load data from your uploaded files"""
+    def load_data_from_files(self, precompute_context=False, load_roster=True):
+        """Load data from your uploaded files
+
+        Batch workers that are fed employee rows directly pass load_roster=False
+        so the roster is never held in memory per worker.
+        """
         try:
-            # Load employee data from your CSV file
-            self.employees_df = pd.read_csv("Employee_List.csv")
-            st.success(f"✅ Loaded {len(self.employees_df)} employees from Employee_List.csv")
+            if load_roster:
+                # Load employee data from your CSV file
+                started = time.perf_counter()
+                from roster import load_roster as read_roster
+                invalid_rows = []
+                self.employees_df = read_roster(
+                    self.roster_path,
+                    on_invalid=lambda line, reason: invalid_rows.append(f"line {line}: {reason}")
+                )
+                self.employee_index = EmployeeIndex.from_dataframe(self.employees_df)
+                self._record_timing('roster_load', started)
+                st.success(f"✅ Loaded {len(self.employees_df)} employees from {self.roster_path}")
+                if invalid_rows:
+                    st.warning(f"⚠️ Skipped {len(invalid_rows)} invalid roster row(s): {'; '.join(invalid_rows[:5])}")
             
-            # Parse your HR policy documents
-            leave_policy_text = self.parse_pdf("HR-Leave-Policy.pdf")
-            travel_policy_text = self.parse_pdf("HR-Travel-Policy.pdf")
-            
-            if not leave_policy_text or not travel_policy_text:
-                st.error("Failed to parse policy documents")
+            # Load each policy index from the cache, re-embedding only chunks that changed
+            policy_files = self.resolve_policy_files()
+            if not policy_files:
+                st.error(f"No policy PDFs found in {self.policy_dir}")
                 return False
             
-            # Create document chunks
-            documents = []
-            
-            # Process leave policy
-            leave_doc = Document(
-                page_content=leave_policy_text, 
-                metadata={"source": "HR-Leave-Policy", "document_type": "HR_Policy"}
-            )
-            leave_chunks = self.text_splitter.split_documents([leave_doc])
-            documents.extend(leave_chunks)
-            
-            # Process travel policy  
-            travel_doc = Document(
-                page_content=travel_policy_text,
-                metadata={"source": "HR-Travel-Policy", "document_type": "HR_Policy"}
-            )
-            travel_chunks = self.text_splitter.split_documents([travel_doc])
-            documents.extend(travel_chunks)
+            stores = []
+            rebuilt = []
+            source_chunk_ids = {}
+            policy_keys = {}
+            for source, filepath in policy_files.items():
+                store, policy_keys[source], changes = self.sync_policy_document(source, filepath)
+                if store is None:
+                    st.error("Failed to parse policy documents")
+                    return False
+                if changes is not None:
+                    rebuilt.append(f"{source} (+{changes['added']}/-{changes['removed']} chunks)")
+                source_chunk_ids[source] = list(store.index_to_docstore_id.values())
+                stores.append(store)
             
-            st.success(f"✅ Created {len(documents)} document chunks from HR policies")
+            if rebuilt:
+                st.success(f"✅ Updated {', '.join(rebuilt)} in the index cache")
+            if len(rebuilt) < len(stores):
+                st.success(f"✅ Loaded {len(stores) - len(rebuilt)} policy index(es) from the index cache")
             
-            # Create FAISS vector store
-            self.vector_store = FAISS.from_documents(documents, self.embeddings)
+            # Combine the per-document indexes into a single FAISS vector store
+            with self._index_lock:
+                self.vector_store = stores[0]
+                for store in stores[1:]:
+                    self.vector_store.merge_from(store)
+                self.source_chunk_ids = source_chunk_ids
+                self.policy_keys = policy_keys
+                self.policy_file_state = self._policy_file_state(policy_files)
+                self.invalidate_context_cache()
             st.success("✅ Vector store created successfully")
+            
+            if precompute_context and self.employees_df is not None:
+                count = self.precompute_contexts()
+                if count:
+                    st.success(f"✅ Precomputed policy context for {count} band/department combinations")
             return True
             
         except FileNotFoundError as e:
@@ -84,243 +199,325 @@ class HROfferLetterRAG:
             st.error(f"Error loading data: {str(e)}")
             return False
     
+    @property
+    def index_version(self):
+        """Hash of every indexed policy document's cache key"""
+        payload = json.dumps(sorted(self.policy_keys.items()))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def resolve_policy_files(self):
+        """Every PDF in policy_dir, or the bundled policy documents"""
+        return discover_policies(self.policy_dir) if self.policy_dir else dict(POLICY_FILES)
+    
+    def _policy_file_state(self, policy_files):
+        state = {}
+        for source, filepath in policy_files.items():
+            stat = os.stat(filepath)
+            state[source] = (filepath, stat.st_mtime_ns, stat.st_size)
+        return state
+    
+    def policy_files_changed(self):
+        """Cheap check, by file list, size and mtime, for policy documents edited on disk"""
+        try:
+            return self._policy_file_state(self.resolve_policy_files()) != self.policy_file_state
+        except OSError:
+            return True
+    
+    def chunk_policy_document(self, source, filepath):
+        """Parse and chunk a single policy document"""
+        from langchain.schema import Document
+        
+        policy_text = self.parse_pdf(filepath)
+        if not policy_text:
+            return None
+        
+        policy_doc = Document(
+            page_content=policy_text,
+            metadata={"source": source, "document_type": "HR_Policy"}
+        )
+        chunks = self.text_splitter.split_documents([policy_doc])
+        st.success(f"✅ Created {len(chunks)} document chunks from {source}")
+        return chunks
+    
+    @instrumented('build_policy_index')
+    def build_policy_index(self, source, filepath):
+        """Parse, chunk and embed a single policy document from scratch"""
+        from langchain.vectorstores import FAISS
+        
+        chunks = self.chunk_policy_document(source, filepath)
+        if not chunks:
+            return None
+        return FAISS.from_documents(chunks, self.embeddings, ids=chunk_ids(chunks))
+    
+    def sync_policy_document(self, source, filepath):
+        """Bring one document's cached index up to date, embedding only new chunks
+
+        Returns (store, document key, changes), where changes is None on a cache hit
+        or a dict of added and removed chunk counts when the document was re-indexed.
+        Only the on-disk cache is touched, so this can run without holding _index_lock.
+        """
+        from langchain.vectorstores import FAISS
+        
+        started = time.perf_counter()
+        key = self.index_cache.document_key(filepath)
+        store = self.index_cache.load(source, key, self.embeddings)
+        self._record_timing('index_load', started)
+        if store is not None:
+            self.metrics.increment('index_cache_hit')
+            return store, key, None
+        self.metrics.increment('index_cache_miss')
+        
+        started = time.perf_counter()
+        chunks = self.chunk_policy_document(source, filepath)
+        if not chunks:
+            return None, key, None
+        ids = chunk_ids(chunks)
+        
+        # Diff against the last indexed version of this document by chunk content hash
+        store = self.index_cache.load_previous(source, self.embeddings)
+        previous_ids = set(store.index_to_docstore_id.values()) if store is not None else set()
+        removed = list(previous_ids - set(ids))
+        added = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in previous_ids]
+        
+        if added:
+            texts = [chunk.page_content for _, chunk in added]
+            with self.metrics.time('chunk_embedding'):
+                vectors = self.embeddings.embed_documents(texts)
+            text_embeddings = list(zip(texts, vectors))
+            metadatas = [chunk.metadata for _, chunk in added]
+            added_ids = [chunk_id for chunk_id, _ in added]
+        if store is None:
+            store = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=added_ids)
+        else:
+            if removed:
+                store.delete(removed)
+            if added:
+                store.add_embeddings(text_embeddings, metadatas=metadatas, ids=added_ids)
+        
+        self.index_cache.save(source, key, store)
+        self._record_timing('index_build', started)
+        self.metrics.increment('chunks_embedded', len(added))
+        self.metrics.increment('chunks_removed', len(removed))
+        return store, key, {'added': len(added), 'removed': len(removed), 'total': len(ids)}
+    
+    def reload_policies(self):
+        """Apply added, edited and removed policy documents to the live index in place
+
+        Only chunks whose content changed are embedded; everything else is kept.
+        Parsing and embedding happen before the index lock is taken, so searches keep
+        being served until the diff is applied. Returns per-source counts of chunks
+        added to and removed from the live index.
+        """
+        with self._reload_lock:
+            policy_files = self.resolve_policy_files()
+            synced = {}
+            for source, filepath in policy_files.items():
+                store, key, _ = self.sync_policy_document(source, filepath)
+                if store is None:
+                    raise ValueError(f"Failed to parse {filepath}")
+                synced[source] = (store, key)
+            
+            summary = {}
+            with self._index_lock:
+                for source, (store, key) in synced.items():
+                    summary[source] = self._apply_to_live_index(source, store)
+                    self.policy_keys[source] = key
+                
+                # Documents that disappeared from disk are dropped from the index and the cache
+                for source in [source for source in self.source_chunk_ids if source not in policy_files]:
+                    stale_ids = self.source_chunk_ids.pop(source)
+                    self.policy_keys.pop(source, None)
+                    if stale_ids:
+                        self.vector_store.delete(stale_ids)
+                    self.index_cache.remove(source)
+                    summary[source] = {'added': 0, 'removed': len(stale_ids)}
+                
+                self.policy_file_state = self._policy_file_state(policy_files)
+                # Cleared under the lock so no search against the old index can repopulate it
+                self.invalidate_context_cache()
+            return summary
+    
+    def _apply_to_live_index(self, source, store):
+        live_ids = set(self.source_chunk_ids.get(source, ()))
+        position_by_id = {chunk_id: position for position, chunk_id in store.index_to_docstore_id.items()}
+        stale_ids = [chunk_id for chunk_id in live_ids if chunk_id not in position_by_id]
+        fresh_ids = [chunk_id for chunk_id in position_by_id if chunk_id not in live_ids]
+        
+        if stale_ids:
+            self.vector_store.delete(stale_ids)
+        if fresh_ids:
+            # Reuse the vectors already computed for the document's store instead of re-embedding
+            documents = [store.docstore.search(chunk_id) for chunk_id in fresh_ids]
+            vectors = [store.index.reconstruct(position_by_id[chunk_id]).tolist() for chunk_id in fresh_ids]
+            self.vector_store.add_embeddings(
+                [(document.page_content, vector) for document, vector in zip(documents, vectors)],
+                metadatas=[document.metadata for document in documents],
+                ids=fresh_ids
+            )
+        
+        self.source_chunk_ids[source] = list(position_by_id)
+        return {'added': len(fresh_ids), 'removed': len(stale_ids)}
+    
     def get_relevant_context(self, employee_data):
         """Retrieve relevant policy context for employee using RAG"""
+        cache_key = (employee_data['Band'], employee_data['Department'])
+        context = self.context_cache.get(cache_key)
+        if context is not None:
+            self.metrics.increment('context_cache_hit')
+            return context
+        
+        self.metrics.increment('context_cache_miss')
         query = f"band {employee_data['Band']} department {employee_data['Department']} leave policy travel policy salary benefits"
-        relevant_docs = self.vector_store.similarity_search(query, k=6)
-        context = "\n\n".join([doc.page_content for doc in relevant_docs])
+        # Embed and search separately so each shows up as its own stage
+        with self.metrics.time('query_embedding'):
+            query_vector = self.embeddings.embed_query(query)
+        with self.metrics.time('faiss_search'), self._index_lock:
+            relevant_docs = self.vector_store.similarity_search_by_vector(query_vector, k=6)
+            context = "\n\n".join([doc.page_content for doc in relevant_docs])
+            # Stored under the lock so a reload's invalidation cannot be overtaken by a stale result
+            self.context_cache[cache_key] = context
         return context
     
+    def invalidate_context_cache(self):
+        """Drop memoized retrieval results, e.g. after the vector store is rebuilt"""
+        self.context_cache.clear()
+        self.templates.clear_fragments()
+        # Letters keyed on the old index version can no longer be hit; free them from memory
+        self.letter_cache.clear(memory_only=True)
+    
+    def precompute_contexts(self):
+        """Warm the retrieval cache for every band/department pair on the roster
+
+        Skipped when the default template does not quote policy passages, so the
+        embedding model is not loaded for nothing.
+        """
+        if CONTEXT_FIELD not in self.templates.get().field_names:
+            return 0
+        combinations = self.employees_df[['Band', 'Department']].drop_duplicates()
+        for band, department in combinations.itertuples(index=False):
+            self.get_relevant_context({'Band': band, 'Department': department})
+        return len(combinations)
+    
     def extract_salary_breakdown(self, employee_info):
         """Extract and format salary information"""
         salary_breakdown = {
-            'base_salary': f"₹{employee_info['Base Salary (INR)']:,}",
-            'performance_bonus': f"₹{employee_info['Performance Bonus (INR)']:,}",
-            'retention_bonus': f"₹{employee_info['Retention Bonus (INR)']:,}",
-            'total_ctc': f"₹{employee_info['Total CTC (INR)']:,}",
-            'monthly_gross': f"₹{employee_info['Total CTC (INR)'] // 12:,}",
+            'base_salary': format_inr(employee_info['Base Salary (INR)']),
+            'performance_bonus': format_inr(employee_info['Performance Bonus (INR)']),
+            'retention_bonus': format_inr(employee_info['Retention Bonus (INR)']),
+            'total_ctc': format_inr(employee_info['Total CTC (INR)']),
+            'monthly_gross': format_inr(employee_info['Total CTC (INR)'] // 12),
         }
         return salary_breakdown
     
-    def extract_policy_info_from_context(self, band, department, context):
-        """Extract policy information from RAG context using actual document content"""
-        policies = {
-            'leave': {'total_days': 'As per policy', 'wfh': 'As per band', 'wfo': 'As per team'},
-            'travel': {'approval': 'As per hierarchy', 'entitlements': 'As per band'},
-            'benefits': {'setup_grant': 'As applicable', 'internet_stipend': 'As applicable'}
-        }
-        
-        context_lower = context.lower()
-        
-        # Extract leave information for specific band from actual policy
-        band_patterns = {
-            'L1': {'total_days': 12, 'earned': 6, 'sick': 4, 'casual': 2, 'wfh': 'Limited', 'wfo': '4 days/week minimum'},
-            'L2': {'total_days': 15, 'earned': 8, 'sick': 5, 'casual': 2, 'wfh': 'Partial', 'wfo': '3-4 days/week'},
-            'L3': {'total_days': 18, 'earned': 10, 'sick': 6, 'casual': 2, 'wfh': 'Yes', 'wfo': '3 days/week minimum'},
-            'L4': {'total_days': 20, 'earned': 12, 'sick': 6, 'casual': 2, 'wfh': 'Yes', 'wfo': '2-3 days/week'},
-            'L5': {'total_days': 'Unlimited (with approval)', 'earned': 'NA', 'sick': 'NA', 'casual': 'NA', 'wfh': 'Full Flex', 'wfo': '0-2 days/week (optional)'}
-        }
-        
-        # Travel policies extracted from your HR-Travel-Policy.pdf
-        travel_patterns = {
-            'L1': {'flight': 'Economy (on approval)', 'hotel': 'Rs. 2,000/night', 'per_diem_domestic': 'Rs. 1,500/day', 'per_diem_intl': 'USD 30/day', 'approval': 'Manager + VP'},
-            'L2': {'flight': 'Economy (>6hrs)', 'hotel': 'Rs. 3,000/night', 'per_diem_domestic': 'Rs. 2,000/day', 'per_diem_intl': 'USD 40/day', 'approval': 'Manager + Director'},
-            'L3': {'flight': 'Economy standard', 'hotel': 'Rs. 4,000/night', 'per_diem_domestic': 'Rs. 3,000/day', 'per_diem_intl': 'USD 60/day', 'approval': 'Reporting Manager'},
-            'L4': {'flight': 'Premium Economy', 'hotel': 'Rs. 6,000/night', 'per_diem_domestic': 'Rs. 4,500/day', 'per_diem_intl': 'USD 80/day', 'approval': 'VP'},
-            'L5': {'flight': 'Business Class', 'hotel': 'Rs. 10,000/night', 'per_diem_domestic': 'Rs. 7,500/day', 'per_diem_intl': 'USD 120/day', 'approval': 'None'}
-        }
-        
-        # Department-specific WFO from your HR-Leave-Policy.pdf
-        wfo_patterns = {
-            'Engineering': {'minimum': '3 days/week', 'suggested': 'Mon, Tue, Thu', 'notes': 'Sprint reviews must be in-office'},
-            'Sales': {'minimum': '4-5 days/week', 'suggested': 'Field visits + office', 'notes': 'Remote only with RSM approval'},
-            'HR': {'minimum': '4 days/week', 'suggested': 'Mon-Thu', 'notes': 'In-office mandatory during onboarding'},
-            'Finance': {'minimum': '3 days/week', 'suggested': 'Tue, Wed, Fri', 'notes': 'Fully in-office during month-end'},
-            'Operations': {'minimum': '5 days/week', 'suggested': 'All weekdays', 'notes': 'WFH not permitted except in emergencies'}
-        }
-        
+    def extract_policy_info_from_context(self, band, department, context=None):
+        """Look up leave, travel and WFO policies for a band and department"""
         return {
-            'leave': band_patterns.get(band, {}),
-            'travel': travel_patterns.get(band, {}),
-            'wfo': wfo_patterns.get(department, {})
+            'leave': BAND_LEAVE_POLICY.get(band, {}),
+            'travel': BAND_TRAVEL_POLICY.get(band, {}),
+            'wfo': DEPARTMENT_WFO_POLICY.get(department, {})
         }
     
     def get_position_title(self, department):
         """Get position title based on department"""
-        titles = {
-            'Engineering': 'Software Engineer',
-            'Sales': 'Sales Executive', 
-            'HR': 'HR Specialist',
-            'Finance': 'Financial Analyst',
-            'Operations': 'Operations Specialist'
-        }
-        return titles.get(department, 'Team Member')
+        return POSITION_TITLES.get(department, 'Team Member')
+    
+    @instrumented('employee_lookup')
+    def find_employee(self, employee_name):
+        """Look up an employee row by full name, or by a name prefix or fragment only one employee has"""
+        return self.employees_df.iloc[self.employee_index.resolve(employee_name)].to_dict()
+    
+    @instrumented('employee_lookup')
+    def find_employee_by_id(self, employee_id):
+        """Look up an employee row by the roster's Employee ID column"""
+        if not self.employee_index.has_ids:
+            raise ValueError(f"The roster has no '{EmployeeIndex.ID_COLUMN}' column; look employees up by name")
+        position = self.employee_index.lookup_id(employee_id)
+        if position is None:
+            raise ValueError(f"Employee ID '{employee_id}' not found")
+        return self.employees_df.iloc[position].to_dict()
     
-    def generate_offer_letter(self, employee_name):
+    def search_employees(self, query, limit=5):
+        """Return ranked candidate names for a partial or misspelled query"""
+        return [self.employees_df.iloc[position]['Employee Name'] for position, _, _ in self.employee_index.search(query, limit)]
+    
+    @instrumented('generate_offer_letter')
+    def generate_offer_letter(self, employee_name, locale=DEFAULT_LOCALE, profile=False):
         """Generate offer letter using parsed documents and RAG"""
-        employee_data = self.employees_df[
-            self.employees_df['Employee Name'].str.contains(employee_name, case=False, na=False)
-        ]
-        
-        if employee_data.empty:
-            raise ValueError(f"Employee '{employee_name}' not found")
-        
-        employee_info = employee_data.iloc[0].to_dict()
+        with self.metrics.profile(f"generate_offer_letter({employee_name!r})", force=profile):
+            return self.render_offer_letter(self.find_employee(employee_name), locale=locale)
+    
+    def letter_group_fields(self, band, department, include_context=False):
+        """Template fields that depend only on band and department
+
+        Retrieval (and with it the embedding model) is only used when the template
+        quotes policy passages through the policy_context field.
+        """
+        policies = self.extract_policy_info_from_context(band, department)
         
-        # Get relevant context using RAG
-        context = self.get_relevant_context(employee_info)
+        fields = {
+            'band': band,
+            'department': department,
+            'position_title': self.get_position_title(department),
+        }
+        if include_context:
+            fields[CONTEXT_FIELD] = self.get_relevant_context({'Band': band, 'Department': department})
+        for section in ('leave', 'travel', 'wfo'):
+            for key in LETTER_POLICY_FIELDS[section]:
+                fields[f"{section}_{key}"] = policies[section].get(key, 'N/A')
+        return fields
+    
+    def letter_employee_fields(self, employee_info, letter_date=None):
+        """Template fields that change from one employee to the next"""
+        # Dates parsed during roster ingestion are printed in the CSV's ISO format
+        joining_date = employee_info['Joining Date']
+        if hasattr(joining_date, 'strftime'):
+            joining_date = joining_date.strftime('%Y-%m-%d')
         
-        # Extract policy information from your documents
-        policies = self.extract_policy_info_from_context(
-            employee_info['Band'], 
-            employee_info['Department'], 
-            context
-        )
+        fields = {
+            'date': letter_date or datetime.now().strftime('%B %d, %Y'),
+            'employee_name': employee_info['Employee Name'],
+            'location': employee_info['Location'],
+            'joining_date': joining_date,
+        }
+        # Rows from enrich_roster() already carry the formatted salary columns
+        if 'monthly_gross' in employee_info and all(field in employee_info for field in SALARY_FIELDS):
+            for field in ['monthly_gross', *SALARY_FIELDS]:
+                fields[field] = employee_info[field]
+        else:
+            fields.update(self.extract_salary_breakdown(employee_info))
+        return fields
+    
+    @instrumented('render_offer_letter')
+    def render_offer_letter(self, employee_info, locale=DEFAULT_LOCALE):
+        """Render the offer letter for a single employee row"""
+        band = employee_info['Band']
+        department = employee_info['Department']
+        template = self.templates.get(locale=locale, role=department)
         
-        # Extract salary breakdown
-        salary = self.extract_salary_breakdown(employee_info)
+        # Letters are fully determined by the row, index version, policy tables, template and date
+        letter_date = datetime.now().strftime('%B %d, %Y')
+        cache_key = letter_cache_key(employee_info, self.index_version, POLICY_TABLES_DIGEST, template.digest,
+                                     letter_date, locale)
+        cached_letter = self.letter_cache.get(cache_key)
+        if cached_letter is not None:
+            self.metrics.increment('letter_cache_hit')
+            return cached_letter
+        self.metrics.increment('letter_cache_miss')
         
-        # Generate position title
-        position_title = self.get_position_title(employee_info['Department'])
+        self.metrics.increment('template_fragment_hit' if template.has_fragment((band, department)) else 'template_fragment_miss')
         
-        # Create comprehensive offer letter
-        offer_letter = f"""
-═══════════════════════════════════════════════════════════════
-📄 OFFER LETTER – COMPANY ABC
-═══════════════════════════════════════════════════════════════
-
-Date: {datetime.now().strftime('%B %d, %Y')}
-
-Dear {employee_info['Employee Name']},
-
-We are pleased to extend this offer of employment for the position of {position_title} 
-in the {employee_info['Department']} team at Company ABC.
-
-CANDIDATE DETAILS:
-• Name: {employee_info['Employee Name']}
-• Position: {position_title}
-• Band Level: {employee_info['Band']}
-• Department: {employee_info['Department']}
-• Work Location: {employee_info['Location']}
-• Joining Date: {employee_info['Joining Date']}
-
-═══════════════════════════════════════════════════════════════
-1. 💰 COMPENSATION & SALARY BREAKDOWN
-═══════════════════════════════════════════════════════════════
-
-Annual Compensation Structure:
-
-Component                          Amount (INR)
-─────────────────────────────────────────────
-Base Salary (Fixed)               {salary['base_salary']}
-Performance Bonus                  {salary['performance_bonus']}
-Retention Bonus                    {salary['retention_bonus']}
-─────────────────────────────────────────────
-TOTAL ANNUAL CTC                   {salary['total_ctc']}
-Monthly Gross (Approx.)            {salary['monthly_gross']}
-
-• Performance bonuses are paid quarterly based on individual and company performance
-• Retention bonus is paid over the specified period as per company policy
-• Salary reviews are conducted annually based on performance and market benchmarks
-
-═══════════════════════════════════════════════════════════════
-2. 🏖️ LEAVE ENTITLEMENTS & WORK ARRANGEMENTS (Band {employee_info['Band']})
-═══════════════════════════════════════════════════════════════
-
-Based on your band level and our HR Leave Policy:
-
-• Annual Leave Entitlement: {policies['leave'].get('total_days', 'N/A')} days
-  - Earned Leave: {policies['leave'].get('earned', 'N/A')} days
-  - Sick Leave: {policies['leave'].get('sick', 'N/A')} days  
-  - Casual Leave: {policies['leave'].get('casual', 'N/A')} days
-• Work From Home Eligibility: {policies['leave'].get('wfh', 'N/A')}
-• Work From Office Requirement: {policies['leave'].get('wfo', 'N/A')}
-
-{employee_info['Department']} Team Specific Requirements:
-• Minimum WFO: {policies['wfo'].get('minimum', 'N/A')}
-• Suggested Days: {policies['wfo'].get('suggested', 'N/A')}
-• Special Notes: {policies['wfo'].get('notes', 'N/A')}
-
-Leave Management:
-• All leaves must be applied through HRMS with manager approval
-• Leave balances reset annually on January 1st
-• Carry-forward up to 10 days permitted
-• Emergency leave can be regularized post-facto
-
-═══════════════════════════════════════════════════════════════
-3. ✈️ TRAVEL POLICY & BENEFITS (Band {employee_info['Band']})
-═══════════════════════════════════════════════════════════════
-
-Business Travel Entitlements (as per HR Travel Policy):
-• Flight Class: {policies['travel'].get('flight', 'N/A')}
-• Hotel Cap: {policies['travel'].get('hotel', 'N/A')}
-• Per Diem (Domestic): {policies['travel'].get('per_diem_domestic', 'N/A')}
-• Per Diem (International): {policies['travel'].get('per_diem_intl', 'N/A')}
-• Approval Required: {policies['travel'].get('approval', 'N/A')}
-
-• All travel must be booked through approved corporate platforms
-• Expense reimbursement as per company travel policy
-
-Additional Benefits:
-• Home office setup support: Rs. 5,000 (for L3+)
-• Monthly internet reimbursement: Rs. 1,000/month (for hybrid-eligible roles)
-• Health insurance and other statutory benefits as per company policy
-
-═══════════════════════════════════════════════════════════════
-4. 🔒 EMPLOYMENT TERMS & CONDITIONS
-═══════════════════════════════════════════════════════════════
-
-• Employment Type: Full-time, permanent position
-• Probation Period: 3 months from joining date
-• Notice Period: 60 days (15 days during probation)
-• Working Hours: As per company policy and team requirements
-
-Confidentiality & IP:
-• All work products and innovations belong to Company ABC
-• Strict confidentiality of proprietary information required
-• Non-disclosure agreement will be provided separately
-
-═══════════════════════════════════════════════════════════════
-5. 📋 APPLICABLE HR POLICIES
-═══════════════════════════════════════════════════════════════
-
-Your employment is governed by:
-• Company ABC Employee Handbook
-• Leave & Work from Office Policy (Version: July 2025)
-• HR Travel Policy (Version: July 2025)
-• Code of Conduct and other company policies
-
-All policies are available on the company intranet and HRMS portal.
-
-═══════════════════════════════════════════════════════════════
-6. 🎯 NEXT STEPS
-═══════════════════════════════════════════════════════════════
-
-To accept this offer:
-1. Sign and return this letter within 5 working days
-2. Submit required documents for background verification
-3. Complete pre-joining formalities as communicated by HR
-
-Your assigned HR Business Partner will contact you with:
-• Onboarding timeline and checklist
-• Document requirements
-• First-day joining instructions
-
-We look forward to welcoming you to the Company ABC family!
-
-Warm regards,
-
-Aarti Nair
-HR Business Partner
-Company ABC
-
-📧 peopleops@companyabc.com
-🌐 www.companyabc.com
-📞 +91-XXXX-XXXXXX
-
-═══════════════════════════════════════════════════════════════
-"""
-        return offer_letter.strip()
+        with self.metrics.profile(f"render_offer_letter({employee_info['Employee Name']!r})"):
+            # Band/department sections are compiled once per group; only employee fields are spliced in
+            with self.metrics.time('template_render'):
+                offer_letter = template.render(
+                    (band, department),
+                    lambda: self.letter_group_fields(band, department, CONTEXT_FIELD in template.field_names),
+                    self.letter_employee_fields(employee_info, letter_date)
+                )
+        self.metrics.increment('letters_rendered')
+        offer_letter = offer_letter.strip()
+        self.letter_cache.put(cache_key, offer_letter)
+        return offer_letter
 
 @st.cache_resource
 def initialize_rag_system():
@@ -348,8 +545,30 @@ def main():
         with st.sidebar:
             st.header("📋 Available Employees")
             st.caption(f"From Employee_List.csv ({len(rag_system.employees_df)} total)")
-            for _, employee in rag_system.employees_df.iterrows():
-                st.write(f"• **{employee['Employee Name']}** ({employee['Department']}, {employee['Band']})")
+            sidebar_rows = rag_system.employees_df.head(SIDEBAR_EMPLOYEE_LIMIT)
+            for name, department, band in sidebar_rows[['Employee Name', 'Department', 'Band']].itertuples(index=False, name=None):
+                st.write(f"• **{name}** ({department}, {band})")
+            if len(rag_system.employees_df) > SIDEBAR_EMPLOYEE_LIMIT:
+                st.caption(f"…and {len(rag_system.employees_df) - SIDEBAR_EMPLOYEE_LIMIT} more. Search by name to find them.")
+            
+            with st.expander("⏱️ Startup report"):
+                for stage, seconds in rag_system.startup_report().items():
+                    st.write(f"• {stage.replace('_', ' ').capitalize()}: {seconds:.2f}s")
+            
+            # Policy edits are applied to the shared index in place, without a restart
+            if rag_system.policy_files_changed():
+                st.warning("⚠️ Policy documents changed on disk")
+            if st.button("🔄 Reload policies"):
+                try:
+                    with st.spinner("Applying policy changes to the index..."):
+                        changes = rag_system.reload_policies()
+                    changed = {source: counts for source, counts in changes.items() if counts['added'] or counts['removed']}
+                    if changed:
+                        st.success("✅ " + ", ".join(f"{source}: +{counts['added']}/-{counts['removed']} chunks" for source, counts in changed.items()))
+                    else:
+                        st.info("Policies are already up to date")
+                except Exception as e:
+                    st.error(f"❌ Error reloading policies: {str(e)}")
         
         # Main interface
         st.header("🎯 Generate Offer Letter")
@@ -364,29 +583,107 @@ def main():
         if st.button("🚀 Generate Offer Letter", type="primary"):
             if employee_name:
                 try:
+                    # Profiling is requested per session and applies to this one letter only
+                    profile_letter = st.session_state.get('profile_next_letter', False)
+                    st.session_state['profile_next_letter'] = False
                     with st.spinner(f"Generating offer letter for {employee_name}..."):
-                        offer_letter = rag_system.generate_offer_letter(employee_name)
+                        offer_letter = rag_system.generate_offer_letter(employee_name, profile=profile_letter)
                     
                     st.success(f"✅ Offer letter generated for {employee_name}!")
                     
                     # Display the offer letter
                     st.text_area("📄 Generated Offer Letter:", value=offer_letter, height=600)
                     
-                    # Download button
-                    st.download_button(
-                        label="📥 Download Offer Letter",
-                        data=offer_letter,
-                        file_name=f"{employee_name.replace(' ', '_')}_offer_letter.txt",
-                        mime="text/plain"
-                    )
+                    # Download buttons, one per format
+                    for column, letter_format in zip(st.columns(len(LETTER_FORMATS)), LETTER_FORMATS):
+                        with column:
+                            st.download_button(
+                                label=f"📥 Download .{letter_format}",
+                                data=render_letter(offer_letter, letter_format, title=f"Offer Letter - {employee_name}"),
+                                file_name=letter_filename(employee_name, {}, letter_format),
+                                mime=MIME_TYPES[letter_format]
+                            )
                     
                 except ValueError as e:
+                    # The error already lists the closest employees when there are any
                     st.error(f"❌ {str(e)}")
-                    st.info("💡 Check the sidebar for available employee names from Employee_List.csv")
+                    if not rag_system.search_employees(employee_name):
+                        st.info("💡 Check the sidebar for available employee names from Employee_List.csv")
                 except Exception as e:
                     st.error(f"❌ Error generating offer letter: {str(e)}")
             else:
                 st.warning("⚠️ Please enter an employee name")
+        
+        # Bulk export streams letters into a ZIP on disk as they render, instead of building them all in memory first
+        with st.expander("📦 Bulk export"):
+            employees_df = rag_system.employees_df
+            departments = st.multiselect("Departments", sorted(employees_df['Department'].dropna().unique()))
+            bands = st.multiselect("Bands", sorted(employees_df['Band'].dropna().unique()))
+            export_format = st.selectbox("Format", LETTER_FORMATS, index=LETTER_FORMATS.index("pdf"))
+            selected = employees_df
+            if departments:
+                selected = selected[selected['Department'].isin(departments)]
+            if bands:
+                selected = selected[selected['Band'].isin(bands)]
+            st.caption(f"{len(selected)} employee(s) selected")
+            
+            if st.button("📦 Build ZIP", disabled=selected.empty):
+                st.session_state.pop('bulk_export', None)
+                progress = st.progress(0.0)
+                total = len(selected)
+                try:
+                    # An anonymous temp file is deleted by the OS as soon as it is closed, so nothing is left in /tmp
+                    with tempfile.TemporaryFile(suffix=".zip") as archive:
+                        with LetterSink(archive=archive, letter_format=export_format) as sink:
+                            for done, employee_info in enumerate(selected.to_dict("records"), start=1):
+                                letter = rag_system.render_offer_letter(employee_info)
+                                sink.write(employee_info['Employee Name'], render_letter(
+                                    letter, export_format, title=f"Offer Letter - {employee_info['Employee Name']}"
+                                ))
+                                progress.progress(done / total)
+                        archive.seek(0)
+                        st.session_state['bulk_export'] = {
+                            'data': archive.read(), 'format': export_format, 'count': sink.count
+                        }
+                except Exception as e:
+                    st.error(f"❌ Error building export: {str(e)}")
+            
+            export = st.session_state.get('bulk_export')
+            if export:
+                # Streamlit serves the download from memory; the session copy is dropped once it is clicked
+                st.download_button(
+                    label=f"📥 Download {export['count']} letters (.{export['format']}, ZIP)",
+                    data=export['data'],
+                    file_name=f"offer_letters_{export['format']}.zip",
+                    mime="application/zip",
+                    on_click=lambda: st.session_state.pop('bulk_export', None)
+                )
+        
+        # Per-stage timings and cache counters, rendered after generation so they include it
+        with st.expander("🩺 Diagnostics"):
+            metrics = rag_system.metrics
+            # Kept in session state: the generator and its metrics are shared by every session
+            st.checkbox("Capture cProfile and tracemalloc for the next letter", key='profile_next_letter')
+            snapshot = metrics.snapshot()
+            if snapshot['stages']:
+                st.table([
+                    {
+                        'Stage': stage,
+                        'Calls': values['count'],
+                        'Mean (ms)': round(values['mean_ms'], 2),
+                        'Max (ms)': round(values['max_ms'], 2),
+                        'Total (s)': round(values['total_seconds'], 3),
+                    }
+                    for stage, values in snapshot['stages'].items()
+                ])
+            st.json(snapshot['counters'])
+            st.caption("Prometheus text format")
+            st.code(metrics.to_prometheus(), language="text")
+            if metrics.last_profile:
+                st.caption(f"Profile of {metrics.last_profile['label']} "
+                           f"(peak traced memory {metrics.last_profile['peak_traced_bytes'] / 1024:.0f} KiB)")
+                st.code(metrics.last_profile['cprofile'], language="text")
+                st.code("\n".join(metrics.last_profile['tracemalloc_top']), language="text")
     
     else:
         st.error("❌ Failed to load system. Please check if these files exist in the same directory:")
@@ -0,0 +1,87 @@
+"""Policy PDF discovery and page-level text extraction with a per-page cache"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many uncached pages a process pool costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 8
+
+
+def discover_policies(directory):
+    """Map each PDF in a directory to a source name taken from its file name"""
+    policies = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith(".pdf"):
+            policies[os.path.splitext(filename)[0]] = os.path.join(directory, filename)
+    return policies
+
+
+class PageTextCache:
+    """Extracted page text stored on disk by page content hash"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, page_hash):
+        return os.path.join(self.cache_dir, page_hash[:2], page_hash + ".txt")
+
+    def get(self, page_hash):
+        try:
+            with open(self._path(page_hash), 'r', encoding="utf-8") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def put(self, page_hash, text):
+        path = self._path(page_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f"{path}.{os.getpid()}.tmp"
+        with open(staging_path, 'w', encoding="utf-8") as file:
+            file.write(text)
+        os.replace(staging_path, path)
+
+
+def page_hashes(pdf_reader):
+    """Hash each page's content stream, which changes whenever the page's text does"""
+    hashes = []
+    for page in pdf_reader.pages:
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        hashes.append(hashlib.sha256(data).hexdigest())
+    return hashes
+
+
+def _extract_pages(filepath, page_numbers):
+    import PyPDF2
+    with open(filepath, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [(number, pdf_reader.pages[number].extract_text() or "") for number in page_numbers]
+
+
+def extract_pdf_text(filepath, page_cache=None, max_workers=None):
+    """Return the document's text, re-extracting only pages missing from the cache"""
+    import PyPDF2
+    with open(filepath, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        hashes = page_hashes(pdf_reader)
+
+        texts = [page_cache.get(page_hash) if page_cache else None for page_hash in hashes]
+        missing = [number for number, text in enumerate(texts) if text is None]
+
+        if len(missing) < PARALLEL_PAGE_THRESHOLD or max_workers == 1:
+            extracted = [(number, pdf_reader.pages[number].extract_text() or "") for number in missing]
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            # Contiguous slices so each worker parses the file once for many pages
+            slice_size = -(-len(missing) // workers)
+            slices = [missing[i:i + slice_size] for i in range(0, len(missing), slice_size)]
+            with ProcessPoolExecutor(max_workers=len(slices)) as pool:
+                results = pool.map(_extract_pages, [filepath] * len(slices), slices)
+                extracted = [item for result in results for item in result]
+
+    for number, text in extracted:
+        texts[number] = text
+        if page_cache:
+            page_cache.put(hashes[number], text)
+
+    return "\n".join(texts).strip()
@@ -0,0 +1,52 @@
+"""Band and department policy tables used for offer letters"""
+import hashlib
+import json
+
+# Leave entitlements per band from HR-Leave-Policy.pdf
+BAND_LEAVE_POLICY = {
+    'L1': {'total_days': 12, 'earned': 6, 'sick': 4, 'casual': 2, 'wfh': 'Limited', 'wfo': '4 days/week minimum'},
+    'L2': {'total_days': 15, 'earned': 8, 'sick': 5, 'casual': 2, 'wfh': 'Partial', 'wfo': '3-4 days/week'},
+    'L3': {'total_days': 18, 'earned': 10, 'sick': 6, 'casual': 2, 'wfh': 'Yes', 'wfo': '3 days/week minimum'},
+    'L4': {'total_days': 20, 'earned': 12, 'sick': 6, 'casual': 2, 'wfh': 'Yes', 'wfo': '2-3 days/week'},
+    'L5': {'total_days': 'Unlimited (with approval)', 'earned': 'NA', 'sick': 'NA', 'casual': 'NA', 'wfh': 'Full Flex', 'wfo': '0-2 days/week (optional)'}
+}
+
+# Travel policies extracted from your HR-Travel-Policy.pdf
+BAND_TRAVEL_POLICY = {
+    'L1': {'flight': 'Economy (on approval)', 'hotel': 'Rs. 2,000/night', 'per_diem_domestic': 'Rs. 1,500/day', 'per_diem_intl': 'USD 30/day', 'approval': 'Manager + VP'},
+    'L2': {'flight': 'Economy (>6hrs)', 'hotel': 'Rs. 3,000/night', 'per_diem_domestic': 'Rs. 2,000/day', 'per_diem_intl': 'USD 40/day', 'approval': 'Manager + Director'},
+    'L3': {'flight': 'Economy standard', 'hotel': 'Rs. 4,000/night', 'per_diem_domestic': 'Rs. 3,000/day', 'per_diem_intl': 'USD 60/day', 'approval': 'Reporting Manager'},
+    'L4': {'flight': 'Premium Economy', 'hotel': 'Rs. 6,000/night', 'per_diem_domestic': 'Rs. 4,500/day', 'per_diem_intl': 'USD 80/day', 'approval': 'VP'},
+    'L5': {'flight': 'Business Class', 'hotel': 'Rs. 10,000/night', 'per_diem_domestic': 'Rs. 7,500/day', 'per_diem_intl': 'USD 120/day', 'approval': 'None'}
+}
+
+# Department-specific WFO from your HR-Leave-Policy.pdf
+DEPARTMENT_WFO_POLICY = {
+    'Engineering': {'minimum': '3 days/week', 'suggested': 'Mon, Tue, Thu', 'notes': 'Sprint reviews must be in-office'},
+    'Sales': {'minimum': '4-5 days/week', 'suggested': 'Field visits + office', 'notes': 'Remote only with RSM approval'},
+    'HR': {'minimum': '4 days/week', 'suggested': 'Mon-Thu', 'notes': 'In-office mandatory during onboarding'},
+    'Finance': {'minimum': '3 days/week', 'suggested': 'Tue, Wed, Fri', 'notes': 'Fully in-office during month-end'},
+    'Operations': {'minimum': '5 days/week', 'suggested': 'All weekdays', 'notes': 'WFH not permitted except in emergencies'}
+}
+
+# Position titles offered per department
+POSITION_TITLES = {
+    'Engineering': 'Software Engineer',
+    'Sales': 'Sales Executive', 
+    'HR': 'HR Specialist',
+    'Finance': 'Financial Analyst',
+    'Operations': 'Operations Specialist'
+}
+
+# Policy keys exposed to letter templates as <section>_<key> fields
+LETTER_POLICY_FIELDS = {
+    'leave': ['total_days', 'earned', 'sick', 'casual', 'wfh', 'wfo'],
+    'travel': ['flight', 'hotel', 'per_diem_domestic', 'per_diem_intl', 'approval'],
+    'wfo': ['minimum', 'suggested', 'notes'],
+}
+
+# Hash of every table above; cached letters are keyed on it so table edits invalidate them
+POLICY_TABLES_DIGEST = hashlib.sha256(json.dumps(
+    [BAND_LEAVE_POLICY, BAND_TRAVEL_POLICY, DEPARTMENT_WFO_POLICY, POSITION_TITLES, LETTER_POLICY_FIELDS],
+    sort_keys=True
+).encode("utf-8")).hexdigest()
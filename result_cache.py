@@ -0,0 +1,169 @@
+"""Rendered-letter cache: an in-memory LRU in front of an optional SQLite tier"""
+import atexit
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Bump when rendering logic changes in a way the other key inputs do not capture
+CACHE_FORMAT_VERSION = 1
+
+
+def letter_cache_key(employee_info, index_version, policy_version, template_digest, letter_date, locale):
+    """Hash every input that determines a letter's text"""
+    payload = json.dumps({
+        'format': CACHE_FORMAT_VERSION,
+        'employee': {str(column): str(value) for column, value in employee_info.items()},
+        'index_version': index_version,
+        'policy_tables': policy_version,
+        'template': template_digest,
+        'date': letter_date,
+        'locale': locale,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LetterResultCache:
+    """Size- and TTL-bounded letter cache
+
+    The memory tier evicts least recently used entries once either the entry count
+    or the total text size exceeds its limit. When `sqlite_path` is set, letters are
+    also written to a SQLite table so they survive restarts; hits there are promoted
+    back into memory. SQLite writes are buffered and committed `write_batch_size` at a
+    time, and expired or excess rows are swept every `prune_interval` writes, so the
+    table may briefly exceed `sqlite_max_entries` by up to that many rows.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_seconds=24 * 60 * 60,
+                 sqlite_path=None, sqlite_max_entries=100_000, write_batch_size=32, prune_interval=1000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_max_entries = sqlite_max_entries
+        self.write_batch_size = write_batch_size
+        self.prune_interval = prune_interval
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        # Letters written since the last commit, and rows written since the last sweep
+        self._pending = {}
+        self._writes_since_prune = 0
+        if sqlite_path:
+            self._open_db(sqlite_path)
+
+    def _open_db(self, sqlite_path):
+        # main.py swaps pysqlite3 in for sqlite3 before this is imported
+        import sqlite3
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS letters ("
+            "key TEXT PRIMARY KEY, letter TEXT NOT NULL, created REAL NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS letters_created ON letters (created)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS letters_expires ON letters (expires)")
+        # Commit whatever is still buffered when the process exits
+        atexit.register(self.flush)
+
+    def _remember(self, key, letter, expires):
+        size = len(letter.encode("utf-8"))
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[key] = (letter, expires, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                letter, expires, size = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return letter
+                del self._entries[key]
+                self._bytes -= size
+
+            if self._db is None:
+                return None
+            pending = self._pending.get(key)
+            if pending is not None:
+                letter, _, expires = pending
+                if expires > now:
+                    self._remember(key, letter, expires)
+                    return letter
+            row = self._db.execute(
+                "SELECT letter, expires FROM letters WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key, letter):
+        now = time.time()
+        expires = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, letter, expires)
+            if self._db is None:
+                return
+            self._pending[key] = (letter, now, expires)
+            if len(self._pending) >= self.write_batch_size:
+                self._flush_pending()
+
+    def _flush_pending(self):
+        """Write buffered letters in one transaction, sweeping old rows every prune_interval writes"""
+        if not self._pending:
+            return
+        rows = [(key, letter, created, expires) for key, (letter, created, expires) in self._pending.items()]
+        self._pending = {}
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO letters (key, letter, created, expires) VALUES (?, ?, ?, ?)", rows
+            )
+            self._writes_since_prune += len(rows)
+            if self._writes_since_prune >= self.prune_interval:
+                self._prune()
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _prune(self):
+        self._writes_since_prune = 0
+        self._db.execute("DELETE FROM letters WHERE expires <= ?", (time.time(),))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM letters").fetchone()
+        excess = count - self.sqlite_max_entries
+        if excess > 0:
+            # Oldest first, walking the created index only as far as the excess
+            self._db.execute(
+                "DELETE FROM letters WHERE key IN (SELECT key FROM letters ORDER BY created LIMIT ?)", (excess,)
+            )
+
+    def flush(self):
+        """Commit buffered letters to SQLite now"""
+        with self._lock:
+            if self._db is not None:
+                self._flush_pending()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._flush_pending()
+                self._db.close()
+                self._db = None
+
+    def clear(self, memory_only=False):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None and not memory_only:
+                self._pending.clear()
+                self._db.execute("DELETE FROM letters")
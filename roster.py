@@ -0,0 +1,119 @@
+"""Chunked, validated ingestion of the employee roster with compact dtypes"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from compensation import SALARY_COMPONENT_COLUMNS, SALARY_FIELDS, format_inr_series
+from employee_index import EmployeeIndex
+
+DEFAULT_CHUNKSIZE = 50_000
+
+NAME_COLUMN = "Employee Name"
+CATEGORY_COLUMNS = ["Department", "Band", "Location"]
+# Individual components fit comfortably in int32; the total is kept in int64
+SALARY_DTYPES = {
+    "Base Salary (INR)": "int32",
+    "Performance Bonus (INR)": "int32",
+    "Retention Bonus (INR)": "int32",
+    "Total CTC (INR)": "int64",
+}
+DATE_COLUMN = "Joining Date"
+
+# Read everything as text first so bad values can be reported instead of failing the whole file.
+# Employee IDs stay text so leading zeros survive and a blank ID cannot turn the column into floats.
+READ_DTYPES = {
+    NAME_COLUMN: "string",
+    EmployeeIndex.ID_COLUMN: "string",
+    **{column: "string" for column in CATEGORY_COLUMNS},
+}
+
+
+def _validate_chunk(chunk, on_invalid):
+    """Coerce a raw chunk to compact dtypes, dropping and reporting invalid rows"""
+    problems = pd.Series("", index=chunk.index, dtype="object")
+
+    names = chunk[NAME_COLUMN].str.strip()
+    problems[names.isna() | (names == "")] += "missing name; "
+    chunk[NAME_COLUMN] = names
+
+    for column in CATEGORY_COLUMNS:
+        values = chunk[column].str.strip()
+        problems[values.isna() | (values == "")] += f"missing {column}; "
+        chunk[column] = values
+
+    for column, dtype in SALARY_DTYPES.items():
+        numbers = pd.to_numeric(chunk[column], errors="coerce")
+        invalid_number = numbers.isna() | (numbers < 0)
+        problems[invalid_number] += f"invalid {column}; "
+        # Casting to the compact integer dtype would silently truncate or wrap these
+        problems[~invalid_number & (numbers % 1 != 0)] += f"non-integer {column}; "
+        problems[~invalid_number & (numbers > np.iinfo(dtype).max)] += f"{column} out of range for {dtype}; "
+        chunk[column] = numbers
+
+    dates = pd.to_datetime(chunk[DATE_COLUMN], errors="coerce", format="%Y-%m-%d")
+    problems[dates.isna()] += f"invalid {DATE_COLUMN}; "
+    chunk[DATE_COLUMN] = dates
+
+    invalid = problems != ""
+    if invalid.any() and on_invalid is not None:
+        for row_number, reason in problems[invalid].items():
+            # +2 accounts for the header line and 1-based line numbers
+            on_invalid(row_number + 2, reason.rstrip("; "))
+
+    valid = chunk[~invalid]
+    return valid.astype({
+        **SALARY_DTYPES,
+        **{column: "category" for column in CATEGORY_COLUMNS},
+    })
+
+
+def iter_roster_chunks(path, chunksize=DEFAULT_CHUNKSIZE, on_invalid=None):
+    """Yield validated roster chunks, keeping at most one chunk in memory at a time
+
+    `on_invalid(line_number, reason)` is called for every row that is dropped.
+    """
+    reader = pd.read_csv(path, dtype=READ_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        yield _validate_chunk(chunk, on_invalid)
+
+
+def iter_employees(path, chunksize=DEFAULT_CHUNKSIZE, on_invalid=None):
+    """Yield one employee dict per valid roster row"""
+    for chunk in iter_roster_chunks(path, chunksize=chunksize, on_invalid=on_invalid):
+        yield from chunk.to_dict("records")
+
+
+def load_roster(path, chunksize=DEFAULT_CHUNKSIZE, on_invalid=None):
+    """Load the whole roster as one compact DataFrame"""
+    chunks = list(iter_roster_chunks(path, chunksize=chunksize, on_invalid=on_invalid))
+    if not chunks:
+        return pd.read_csv(path, nrows=0)
+
+    # Chunks carry their own categories, so merge them before concatenating
+    for column in CATEGORY_COLUMNS:
+        categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def enrich_roster(employees_df):
+    """Add formatted salaries and CTC consistency checks in one vectorized pass
+
+    Formatted salary columns use the letter template's field names, so rendering can
+    read them straight off the row. Band and department policies are not joined here:
+    templates already compile them once per group.
+    """
+    enriched = employees_df.copy()
+
+    total_ctc = enriched['Total CTC (INR)'].astype("int64")
+    enriched['monthly_gross_inr'] = total_ctc // 12
+    for field, column in SALARY_FIELDS.items():
+        enriched[field] = format_inr_series(enriched[column])
+    enriched['monthly_gross'] = format_inr_series(enriched['monthly_gross_inr'])
+
+    components = sum(enriched[column].astype("int64") for column in SALARY_COMPONENT_COLUMNS)
+    enriched['ctc_mismatch_inr'] = total_ctc - components
+    enriched['ctc_consistent'] = enriched['ctc_mismatch_inr'] == 0
+
+    return enriched
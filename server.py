@@ -0,0 +1,255 @@
+"""Headless async HTTP API for offer letters, sharing one loaded index across requests
+
+Usage:
+    python server.py --port 8000 --workers 4
+    uvicorn server:app
+
+Endpoints:
+    GET  /healthz                 readiness (503 while loading) and roster size
+    GET  /metrics                 Prometheus text metrics
+    POST /letters/by-name         {"name": "Martha Bennett", "locale": "en"}
+    GET  /letters/by-id/<id>      optional ?locale=en
+    POST /letters/batch           {"names": [...], "ids": [...], "locale": "en"}
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from employee_index import normalize_name
+from letter_templates import DEFAULT_LOCALE
+from main import INDEX_CACHE_DIR, ROSTER_FILE, HROfferLetterRAG
+
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH_SIZE = 500
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class OfferLetterService:
+    """ASGI app serving letters from a single shared, read-only HROfferLetterRAG
+
+    Identical requests already in flight are coalesced onto one computation, and all
+    CPU-bound work (lookup, embedding, search, rendering) runs on a bounded thread
+    pool so the event loop stays responsive.
+    """
+
+    def __init__(self, cache_dir=INDEX_CACHE_DIR, roster_path=ROSTER_FILE, policy_dir=None, max_workers=4,
+                 letter_cache_path=None):
+        self.rag = HROfferLetterRAG(cache_dir=cache_dir, roster_path=roster_path, policy_dir=policy_dir,
+                                    letter_cache_path=letter_cache_path)
+        self.max_workers = max_workers
+        self.executor = None
+        self.ready = False
+        self._in_flight = {}
+
+    async def startup(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="offer-letter")
+        loop = asyncio.get_running_loop()
+        # Warm the retrieval cache so the first requests do not pay for embedding
+        loaded = await loop.run_in_executor(
+            self.executor, lambda: self.rag.load_data_from_files(precompute_context=True)
+        )
+        if not loaded:
+            raise RuntimeError("Failed to load employee data and policy documents")
+        self.ready = True
+
+    async def shutdown(self):
+        self.ready = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _coalesced(self, key, func):
+        """Run func on the executor, sharing the result with identical in-flight requests"""
+        future = self._in_flight.get(key)
+        if future is None:
+            self.rag.metrics.increment('http_coalesce_miss')
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(loop.run_in_executor(self.executor, func))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.rag.metrics.increment('http_coalesce_hit')
+        # Shield so one client disconnecting does not cancel the work for the others
+        return await asyncio.shield(future)
+
+    def _letter_for(self, employee_info, locale):
+        return {
+            'employee': employee_info['Employee Name'],
+            'letter': self.rag.render_offer_letter(employee_info, locale=locale),
+        }
+
+    async def letter_by_name(self, name, locale=DEFAULT_LOCALE):
+        key = ('name', normalize_name(name), locale)
+        try:
+            return await self._coalesced(key, lambda: self._letter_for(self.rag.find_employee(name), locale))
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+
+    async def letter_by_id(self, employee_id, locale=DEFAULT_LOCALE):
+        if not self.rag.employee_index.has_ids:
+            raise HTTPError(400, "The roster has no 'Employee ID' column; request letters by name")
+        key = ('id', str(employee_id).strip(), locale)
+        try:
+            return await self._coalesced(key, lambda: self._letter_for(self.rag.find_employee_by_id(employee_id), locale))
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+
+    async def letter_batch(self, names, ids, locale=DEFAULT_LOCALE):
+        requests = [('name', name, self.letter_by_name(name, locale)) for name in names]
+        requests += [('id', employee_id, self.letter_by_id(employee_id, locale)) for employee_id in ids]
+        results = await asyncio.gather(*(request for _, _, request in requests), return_exceptions=True)
+
+        letters = []
+        errors = []
+        for (kind, value, _), result in zip(requests, results):
+            if isinstance(result, HTTPError):
+                errors.append({kind: value, 'error': result.message})
+            elif isinstance(result, Exception):
+                errors.append({kind: value, 'error': f"Error generating offer letter: {result}"})
+            else:
+                letters.append(result)
+        return {'letters': letters, 'errors': errors}
+
+    def _locale(self, locale):
+        """Accept only locales with a template file, so arbitrary strings never reach the registry"""
+        available = self.rag.templates.available_locales()
+        if not isinstance(locale, str) or locale not in available:
+            raise HTTPError(400, f"Unsupported locale, expected one of: {', '.join(sorted(available))}")
+        return locale
+
+    async def _route(self, method, path, query, body):
+        if path == "/healthz" and method == "GET":
+            employees = len(self.rag.employees_df) if self.rag.employees_df is not None else 0
+            # Load balancers should not route traffic here until the index has loaded
+            return (200 if self.ready else 503), {'status': 'ok' if self.ready else 'loading', 'employees': employees}
+        if path == "/metrics" and method == "GET":
+            return 200, self.rag.metrics.to_prometheus()
+
+        if not self.ready:
+            raise HTTPError(503, "Service is still loading")
+        locale = query.get('locale', [DEFAULT_LOCALE])[0]
+        if path == "/letters/by-name" and method == "POST":
+            payload = self._parse_json(body)
+            name = payload.get('name')
+            if not isinstance(name, str) or not name.strip():
+                raise HTTPError(400, "Body must include a non-empty 'name'")
+            return 200, await self.letter_by_name(name, self._locale(payload.get('locale', locale)))
+        if path.startswith("/letters/by-id/") and method == "GET":
+            # ASGI already percent-decodes scope['path']
+            employee_id = path[len("/letters/by-id/"):]
+            if not employee_id:
+                raise HTTPError(400, "Missing employee ID")
+            return 200, await self.letter_by_id(employee_id, self._locale(locale))
+        if path == "/letters/batch" and method == "POST":
+            payload = self._parse_json(body)
+            names = payload.get('names', [])
+            ids = payload.get('ids', [])
+            if not isinstance(names, list) or not isinstance(ids, list):
+                raise HTTPError(400, "'names' and 'ids' must be lists")
+            if len(names) + len(ids) > MAX_BATCH_SIZE:
+                raise HTTPError(413, f"Batches are limited to {MAX_BATCH_SIZE} letters")
+            return 200, await self.letter_batch([str(name) for name in names], [str(i) for i in ids],
+                                                self._locale(payload.get('locale', locale)))
+        raise HTTPError(404, f"No route for {method} {path}")
+
+    @staticmethod
+    def _parse_json(body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != "http":
+            return
+
+        try:
+            body = await self._read_body(receive)
+            status, payload = await self._route(scope['method'], scope['path'],
+                                                parse_qs(scope.get('query_string', b"").decode()), body)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        except Exception as e:
+            status, payload = 500, {'error': f"Error generating offer letter: {e}"}
+
+        if isinstance(payload, str):
+            content, content_type = payload.encode("utf-8"), b"text/plain; version=0.0.4; charset=utf-8"
+        else:
+            content, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), b"application/json"
+        await send({'type': "http.response.start", 'status': status,
+                    'headers': [(b"content-type", content_type), (b"content-length", str(len(content)).encode())]})
+        await send({'type': "http.response.body", 'body': content})
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': "lifespan.startup.failed", 'message': str(e)})
+                    return
+                await send({'type': "lifespan.startup.complete"})
+            elif message['type'] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({'type': "lifespan.shutdown.complete"})
+                return
+
+
+app = OfferLetterService(
+    cache_dir=os.environ.get("OFFER_LETTER_CACHE_DIR", INDEX_CACHE_DIR),
+    roster_path=os.environ.get("OFFER_LETTER_ROSTER", ROSTER_FILE),
+    policy_dir=os.environ.get("OFFER_LETTER_POLICY_DIR"),
+    max_workers=int(os.environ.get("OFFER_LETTER_WORKERS", "4")),
+    letter_cache_path=os.environ.get("OFFER_LETTER_RESULT_CACHE"),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve offer letters over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="Threads for lookup, embedding and rendering")
+    parser.add_argument("--roster", default=ROSTER_FILE, help="Employee CSV to serve (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=INDEX_CACHE_DIR, help="Policy index cache directory")
+    parser.add_argument("--policy-dir", help="Index every PDF in this directory instead of the bundled policies")
+    parser.add_argument("--letter-cache", help="SQLite file that keeps rendered letters across restarts")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    service = OfferLetterService(cache_dir=args.cache_dir, roster_path=args.roster, policy_dir=args.policy_dir,
+                                 max_workers=args.workers, letter_cache_path=args.letter_cache)
+    # One server process so every request shares the same loaded index
+    uvicorn.run(service, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import pytest
+
+from employee_index import EmployeeIndex
+
+ROSTER = ["Martha Bennett", "Julie Rodriguez", "Julian Moss", "Sam Lee", "Sam Lee", "Zoë Clark"]
+
+
+@pytest.fixture
+def index():
+    return EmployeeIndex(ROSTER)
+
+
+def test_exact_name_resolves_ignoring_case_accents_and_spacing(index):
+    assert index.resolve("Martha Bennett") == 0
+    assert index.resolve("  martha   BENNETT ") == 0
+    assert index.resolve("Zoe Clark") == 5
+
+
+def test_shared_exact_name_is_ambiguous(index):
+    with pytest.raises(ValueError, match="Several employees are named 'Sam Lee'"):
+        index.resolve("Sam Lee")
+
+
+def test_unique_prefix_resolves(index):
+    assert index.resolve("Marth") == 0
+    assert index.resolve("Julie") == 1
+
+
+def test_shared_prefix_is_ambiguous(index):
+    with pytest.raises(ValueError, match="Julie Rodriguez, Julian Moss"):
+        index.resolve("Juli")
+
+
+def test_unique_substring_resolves(index):
+    assert index.resolve("Bennett") == 0
+    assert index.resolve("rodrig") == 1
+
+
+def test_fuzzy_match_is_only_suggested(index):
+    with pytest.raises(ValueError, match="No unique match for 'Marth Benet'. Closest employees: Martha Bennett"):
+        index.resolve("Marth Benet")
+
+
+def test_unknown_name_is_not_found(index):
+    with pytest.raises(ValueError, match="not found"):
+        index.resolve("Xavier")
+
+
+def test_ids_are_only_used_when_the_roster_has_them():
+    assert EmployeeIndex(ROSTER).lookup_id("1") is None
+    assert not EmployeeIndex(ROSTER).has_ids
+
+    index = EmployeeIndex(ROSTER, ids=["00042", " 7 ", None, "", "9", "10"])
+    assert index.has_ids
+    assert index.lookup_id("00042") == 0
+    assert index.lookup_id("42") is None
+    assert index.lookup_id("7") == 1
+    assert index.lookup_id("") is None
@@ -0,0 +1,108 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+pytest.importorskip("pysqlite3")
+pytest.importorskip("streamlit")
+
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+
+from main import HROfferLetterRAG
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic stand-in for the sentence-transformers model that records what it embeds"""
+
+    def __init__(self):
+        self.embedded = []
+
+    @staticmethod
+    def _vector(text):
+        return [byte / 255 for byte in hashlib.sha256(text.encode("utf-8")).digest()[:16]]
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def write_policy(path, *chunks):
+    path.write_text("\n\n".join(chunks), encoding="utf-8")
+    return str(path)
+
+
+def live_texts(rag):
+    store = rag.vector_store
+    return sorted(store.docstore.search(chunk_id).page_content for chunk_id in store.index_to_docstore_id.values())
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    rag = HROfferLetterRAG(cache_dir=str(tmp_path / "cache"))
+    rag._embeddings = HashEmbeddings()
+    # Each blank-line separated paragraph of a policy file becomes one chunk
+    monkeypatch.setattr(rag, "chunk_policy_document", lambda source, filepath: [
+        Document(page_content=text, metadata={"source": source})
+        for text in Path(filepath).read_text(encoding="utf-8").split("\n\n")
+    ])
+    return rag
+
+
+def test_sync_embeds_only_added_chunks(rag, tmp_path):
+    leave = write_policy(tmp_path / "leave.pdf", "annual leave", "sick leave", "parental leave")
+
+    store, first_key, changes = rag.sync_policy_document("leave", leave)
+    assert changes == {'added': 3, 'removed': 0, 'total': 3}
+    assert sorted(rag.embeddings.embedded) == ["annual leave", "parental leave", "sick leave"]
+
+    # Unchanged document: served from the cache without embedding anything
+    rag.embeddings.embedded.clear()
+    store, key, changes = rag.sync_policy_document("leave", leave)
+    assert changes is None
+    assert key == first_key
+    assert rag.embeddings.embedded == []
+
+    write_policy(tmp_path / "leave.pdf", "annual leave", "sick leave (revised)", "parental leave", "casual leave")
+    store, key, changes = rag.sync_policy_document("leave", leave)
+    assert changes == {'added': 2, 'removed': 1, 'total': 4}
+    assert key != first_key
+    assert sorted(rag.embeddings.embedded) == ["casual leave", "sick leave (revised)"]
+    assert sorted(store.docstore.search(chunk_id).page_content for chunk_id in store.index_to_docstore_id.values()) == [
+        "annual leave", "casual leave", "parental leave", "sick leave (revised)",
+    ]
+
+
+def test_reload_applies_diff_to_live_index(rag, tmp_path, monkeypatch):
+    policy_files = {
+        'leave': write_policy(tmp_path / "leave.pdf", "annual leave", "sick leave"),
+        'travel': write_policy(tmp_path / "travel.pdf", "economy flights"),
+        'wfh': write_policy(tmp_path / "wfh.pdf", "home office stipend"),
+    }
+    monkeypatch.setattr(rag, "resolve_policy_files", lambda: dict(policy_files))
+    assert rag.load_data_from_files(load_roster=False)
+    assert live_texts(rag) == ["annual leave", "economy flights", "home office stipend", "sick leave"]
+    rag.context_cache[('L1', 'Engineering')] = "stale"
+    version = rag.index_version
+
+    write_policy(tmp_path / "leave.pdf", "annual leave", "sick leave (revised)")
+    del policy_files['wfh']
+    rag.embeddings.embedded.clear()
+    summary = rag.reload_policies()
+
+    assert summary == {
+        'leave': {'added': 1, 'removed': 1},
+        'travel': {'added': 0, 'removed': 0},
+        'wfh': {'added': 0, 'removed': 1},
+    }
+    assert rag.embeddings.embedded == ["sick leave (revised)"]
+    assert live_texts(rag) == ["annual leave", "economy flights", "sick leave (revised)"]
+    assert set(rag.policy_keys) == {'leave', 'travel'}
+    assert rag.index_version != version
+    assert rag.context_cache == {}
+    assert not rag.policy_files_changed()